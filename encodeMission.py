@@ -45,8 +45,10 @@ def generateMissionPCTL(pathMissionJSON, m_list, missionFile, saveFile = False):
 		text_file.close()
 	return spec
 
-def generateMissionMulti(m_list, missionFile, rewardList, saveFile = False):
-	'''multi(Pmax=? [G (m1=1 & m2=1)], R{reward1}min=? [ C ])'''
+def generateMissionMulti(m_list, missionFile, rewardList, saveFile = False, explicit = False):
+	'''multi(Pmax=? [G (m1=1 & m2=1)], R{reward1}min=? [ C ])
+	explicit = True for models imported from explicit files (exportExplicit), whose rewards have no name:
+	multi(Pmax=? [G (m1=1 & m2=1)], R{1}min=? [ C ])'''
 
 	spec = 'multi(Pmax=? [G ('
 
@@ -55,8 +57,11 @@ def generateMissionMulti(m_list, missionFile, rewardList, saveFile = False):
 	spec = spec[:-3]    # remove extra ' & '
 	spec += ')], '
 
-	for r in rewardList:
-		spec += 'R'+ '{"'+r+'"}'+'min=? [ C ], '
+	for r in range(len(rewardList)):
+		if explicit:
+			spec += 'R'+ '{'+str(r+1)+'}'+'min=? [ C ], '
+		else:
+			spec += 'R'+ '{"'+rewardList[r]+'"}'+'min=? [ C ], '
 	spec = spec[:-2] + ')'   # remove extra ', '
 
 
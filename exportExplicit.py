@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+'''
+EXPORT THE MDP IN PRISM'S EXPLICIT FORMATS (.tra, .sta, .lab, .trew) INSTEAD OF THE PRISM LANGUAGE
+
+THIS IS THE SAME MODEL AS THE ONE WRITTEN BY generate_MDP_pruned.writeMDPfile (mdpModel.TeamMDP), ALREADY BUILT:
+- STATES ARE (a_s STATES, m STATES, t), STARTING FROM a_s = 0, m = 1, t = 0
+- ACTION TO_<STATE> IS ENABLED AT t IF ALL OF ITS SENSORS ARE VISIBLE AT t (AND t < finalTime). IT GOES TO
+  a_s = <STATE>, t' = t+1 AND EACH POSSIBLE m WITH THE PROBABILITIES OF ITS ROW OF outcomes
+- STATES AT t = finalTime LOOP ON THEMSELVES (THE SAME SELF-LOOPS PRISM ADDS TO DEADLOCK STATES)
+- THE numAgents REWARD OF AN ACTION IS ITS NUMBER OF AGENTS, IN STATES WHERE allM HOLDS
+
+PRISM READS THE FILES WITH:   prism -importmodel <base>.tra,sta,lab,trew -mdp <property file>
+IMPORTED REWARDS HAVE NO NAME, SO THE PROPERTY REFERS TO THEM BY INDEX (SEE encodeMission.generateMissionMulti)
+'''
+
+import numpy as np
+from generate_MDP_pruned import bits2idx, bits2agents, bits2action
+from mdpModel import mTuple
+
+def explicitStates(model):
+    ''' reachable states of the MDP (a TeamMDP), one timestep at a time
+    returns
+        levels      levels[t] = [(a_s state, m tuple), ...] reachable at t, in order of their state index
+        choices     choices[t] = a_s states of the actions enabled at t (in the same order as allStates)
+        outcomes    {a_s state: [(m tuple, probability), ...]} of the transitions with probability > 0
+    '''
+    num_a, num_s, num_m = model.numASM
+    ptr, cols, vals = model.outcomes.indptr, model.outcomes.indices, model.outcomes.data
+    outcomes = {}
+    for i, state in enumerate(model.states):
+        outcomes[state] = [(mTuple(int(cols[k]), num_m), float(vals[k])) for k in range(ptr[i], ptr[i+1])]
+
+    levels = [[(0, tuple([1]*num_m))]]
+    choices = []
+    for t in range(model.missionLength):
+        choices.append([model.states[i] for i in np.flatnonzero(model.enabled[t])])
+        nextLevel = {}
+        for state in choices[t]:
+            for m, p in outcomes[state]:
+                nextLevel[(state, m)] = None
+        levels.append(list(nextLevel))
+    return levels, choices, outcomes
+
+def exportExplicit(basePath, model, names, bufferSize = 1 << 20):
+    ''' write <basePath>.tra, .sta, .lab and .trew (numAgents transition rewards) of a TeamMDP (mdpModel.buildModel)
+    names from namingTable. returns the number of states, choices and transitions
+    '''
+    num_a, num_s, num_m = model.numASM
+    missionLength = model.missionLength
+    levels, choices, outcomes = explicitStates(model)
+    allOn = tuple([1]*num_m)
+
+    # state indices, level by level (the initial state is 0)
+    first = [0]
+    for level in levels:
+        first.append(first[-1] + len(level))
+    index = [dict((key, first[t] + i) for i, key in enumerate(levels[t])) for t in range(len(levels))]
+    numStates = first[-1]
+
+    numChoices = len(levels[-1])
+    numTrans = len(levels[-1])
+    numRewards = 0
+    for t in range(missionLength):
+        numChoices += len(levels[t]) * len(choices[t])
+        numTrans += len(levels[t]) * sum(len(outcomes[state]) for state in choices[t])
+        numAllM = sum(1 for state, m in levels[t] if m == allOn)
+        numRewards += numAllM * sum(len(outcomes[state]) for state in choices[t] if bits2agents(state, num_s))
+
+    # every state at t has the same choices, so the part of each line after the source state is built once per t
+    with open(basePath + '.tra', 'w', buffering = bufferSize) as tra, open(basePath + '.trew', 'w', buffering = bufferSize) as trew:
+        tra.write('%d %d %d\n' % (numStates, numChoices, numTrans))
+        trew.write('%d %d %d\n' % (numStates, numChoices, numRewards))
+        for t in range(missionLength):
+            traLines = []
+            rewLines = []
+            for c, state in enumerate(choices[t]):
+                action = ' TO_' + bits2action(state, num_s, names) + '\n'
+                numAgents = bits2agents(state, num_s)
+                for m, p in outcomes[state]:
+                    dst = ' %d %d ' % (c, index[t+1][(state, m)])
+                    traLines.append(dst + repr(float(p)) + action)
+                    if numAgents:
+                        rewLines.append(dst + str(numAgents) + '\n')
+            traLines = ''.join(traLines)
+            for i, (state, m) in enumerate(levels[t]):
+                src = str(first[t] + i)
+                tra.write(src + traLines.replace('\n', '\n' + src)[:-len(src)])
+                if m == allOn and rewLines:
+                    trew.write(src + ''.join(rewLines).replace('\n', '\n' + src)[:-len(src)])
+        for i in range(len(levels[-1])):
+            src = first[-1] - len(levels[-1]) + i
+            tra.write('%d 0 %d 1.0\n' % (src, src))
+
+    # valid a_s states in the order of the PRISM module (row-major), then m, then t
+    asIdx = [i*num_s + j for i in range(num_a) for j in range(num_s) if names['as'][i][j] != 'NaN']
+    asNames = [names['as'][i][j] for i in range(num_a) for j in range(num_s) if names['as'][i][j] != 'NaN']
+    with open(basePath + '.sta', 'w', buffering = bufferSize) as sta:
+        sta.write('(' + ','.join(asNames + names['m'] + ['t']) + ')\n')
+        for t in range(len(levels)):
+            for i, (state, m) in enumerate(levels[t]):
+                on = set(bits2idx(state))
+                vals = ['1' if idx in on else '0' for idx in asIdx] + [str(v) for v in m] + [str(t)]
+                sta.write(str(first[t] + i) + ':(' + ','.join(vals) + ')\n')
+
+    with open(basePath + '.lab', 'w', buffering = bufferSize) as lab:
+        lab.write('0="init" 1="deadlock" 2="allM"\n')
+        for t in range(len(levels)):
+            for i, (state, m) in enumerate(levels[t]):
+                labels = []
+                if t == 0 and i == 0:
+                    labels.append('0')
+                if t == missionLength:
+                    labels.append('1')
+                if m == allOn:
+                    labels.append('2')
+                if labels:
+                    lab.write(str(first[t] + i) + ': ' + ' '.join(labels) + '\n')
+
+    return numStates, numChoices, numTrans
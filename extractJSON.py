@@ -1,16 +1,74 @@
 #!/usr/bin/env python
 
 import json
-import math
 import re
 import numpy as np
 import copy
+import os
+import pickle
+import hashlib
 
 def findTarget(pathMissionJSON):
 	with open(pathMissionJSON) as file:
 		data = json.load(file)
 		return data['locations'][0]['name']       # assuming there's only one location in mission 
 
+# {(pathTimeJSON, target): {'stamp': fileStamp, (agent, sensor): (n, 2) windows or None if never visible}}
+# visibility windows already read from an accesses file, kept for the whole process
+timeBoundsMemo = {}
+
+def sensorWindows(isRise, times):
+	''' visibility windows (in days) of a sensor from the events of its timeArray in the JSON file (isRise and 
+	time of each event, see AccessIndex.events). returns an (n, 2) int array [[t1 t2], [t3 t4], ...]
+	'''
+	return eventWindows(isRise, times, [0])[0]
+
+def eventWindows(isRise, times, first):
+	''' visibility windows of several sensors at once: the events of all the sensors are concatenated in isRise 
+	and times, those of sensor i starting at index first[i]. returns a list of (n, 2) int arrays, one per sensor
+	a window goes from the first rise after a set to the next set. rise times are rounded down and set times 
+	rounded up to days (anytime within 0-1 day => seen in day 0), then overlapping/touching windows are merged
+	'''
+	isRise = np.asarray(isRise, dtype = bool)
+	times = np.asarray(times, dtype = float)
+	first = np.asarray(first, dtype = int)
+	afterRise = np.zeros(len(isRise), dtype = bool)     # previous event (of the same sensor) is a rise
+	afterRise[1:] = isRise[:-1]
+	afterRise[first[first < len(isRise)]] = False
+
+	# a window ends at a set right after a rise (the first set following it) and starts at the rise after the 
+	# set before it, i.e. the last rise that follows a set or starts a sensor. rises with no set after them are dropped
+	ends = np.flatnonzero(~isRise & afterRise)
+	starts = np.flatnonzero(isRise & ~afterRise)
+	starts = starts[np.searchsorted(starts, ends) - 1]
+
+	windows = np.empty((len(ends), 2), dtype = int)
+	windows[:, 0] = np.floor(times[starts]/(3600.*24))
+	windows[:, 1] = np.ceil(times[ends]/(3600.*24))
+	owner = np.searchsorted(first, ends, side = 'right') - 1
+	windows, owner = mergeWindows(windows, owner)
+	return np.split(windows, np.cumsum(np.bincount(owner, minlength = len(first)))[:-1])
+
+def mergeWindows(windows, owner = None):
+	''' merge the overlapping or touching windows of an (n, 2) array, e.g. [[0 2] [2 4] [6 7]] -> [[0 4] [6 7]]
+	owner[i] is the sensor of window i if there are several (windows of different owners are not merged)
+	returns the merged windows sorted by owner then start, and their owners
+	'''
+	owner = np.zeros(len(windows), dtype = int) if owner is None else np.asarray(owner, dtype = int)
+	if len(windows) < 2:
+		return windows.reshape(-1, 2), owner
+	order = np.lexsort((windows[:, 0], owner))
+	windows, owner = windows[order], owner[order]
+
+	# running max of the ends within each owner: shift every owner above the values of the previous ones
+	span = windows.max() - windows.min() + 1
+	ends = np.maximum.accumulate(windows[:, 1] + owner*span) - owner*span
+	new = np.ones(len(windows), dtype = bool)       # window starts after every earlier one of its owner ended
+	new[1:] = (windows[1:, 0] > ends[:-1]) | (owner[1:] != owner[:-1])
+	starts = np.flatnonzero(new)
+	lasts = np.append(starts[1:], len(windows)) - 1
+	return np.stack((windows[starts, 0], ends[lasts]), axis = 1), owner[starts]
+
 def findTimeBounds(team, target, pathTimeJSON):
 	'''
 	given a team and target to monitor, extract time bounds of sensor visibility from the JSON file
@@ -23,51 +81,56 @@ def findTimeBounds(team, target, pathTimeJSON):
 
 	output:
 		newTeam 	{agent1: {sensor1__1: [[t1 t2], [t3 t4], ...]}, agentname: {sensor2__1: ...}}
+					each sensor's windows are an (n, 2) int array (see sensorWindows)
+
+	the windows of each (agent, sensor) are memoized (timeBoundsMemo) while pathTimeJSON is unchanged, 
+	so only agents/sensors that were not in an earlier team are read from the file, through its AccessIndex
+	(the JSON file itself is only parsed once, when the index is built)
 	'''
-	sensorTimes = {}      
+	stamp = fileStamp(pathTimeJSON)
+	memo = timeBoundsMemo.get((pathTimeJSON, target))
+	if memo is None or memo['stamp'] != stamp:
+		memo = {'stamp': stamp}
+		timeBoundsMemo[(pathTimeJSON, target)] = memo
+
+	missing = set()
+	for a in team.keys():
+		for i in range(len(team[a])):       # for each sensor of an agent
+			s = list(team[a][i].keys())[0].split('__')[0]
+			if (a, s) not in memo:
+				missing.add((a, s))
+	if missing:
+		accessIndex = loadAccessIndex(pathTimeJSON)
+		missing = sorted(missing)
+		events = [accessIndex.events(a, s, target) for a, s in missing]
+		first = np.cumsum([0] + [len(times) for isRise, times in events])[:-1]
+		windows = eventWindows(np.concatenate([isRise for isRise, times in events]), 
+							   np.concatenate([times for isRise, times in events]), first)
+		for (a, s), (isRise, times), w in zip(missing, events, windows):
+			memo[(a, s)] = w if len(times) else None
+
 	newTeam = {}
-	with open(pathTimeJSON) as time_file:
-		dataTime = json.load(time_file) 
-		for a in team.keys():
-			instrument = dataTime["output"][a]
-			sensorTimes = {}
-			for i in range(len(team[a])):       # for each sensor of an agent
-				S = list(team[a][i].keys())[0]
-				s, sIdx = S.split('__')
-				sensorTimes[S] = []
-				location = instrument[s]
-				timeArray = location[target]
-				started = 0
-				duration = []
-
-				if timeArray['timeArray'] == []:    # if empty
-					raise ValueError ('location is never visible to sensor ' + s + ' on platform ' + a)
-
-				for d in timeArray['timeArray']: 	# for each dict within timeArray
-					if d['isRise']:      			# isRise: True
-						t_init = math.floor(d['time']/(3600.*24)) 		# rounding times down: anytime within 0-1 day => seen in day 0
-						duration.append(t_init)
-						started = 1
-					else:
-						if started:
-							t_final = math.ceil(d['time']/(3600.*24)) # rounding times up: anytime within 0-1 day => seen in day 0
-							duration.append(t_final)
-							sensorTimes[S].append(duration)
-							duration = []
-							started = 0
-				newTeam[a] = sensorTimes
+	for a in team.keys():
+		sensorTimes = {}
+		for i in range(len(team[a])):       # for each sensor of an agent
+			S = list(team[a][i].keys())[0]
+			s, sIdx = S.split('__')
+			if memo[(a, s)] is None:    # if timeArray is empty
+				raise ValueError ('location is never visible to sensor ' + s + ' on platform ' + a)
+			sensorTimes[S] = memo[(a, s)].copy()
+			newTeam[a] = sensorTimes
 	return newTeam
 
-def generate_teamTimeID(pathToDict, teamTime, a_prefix, s_prefix):
+def generate_teamTimeID(kgDict, teamTime, a_prefix, s_prefix):
     ''' convert teamTime agent names and sensor names into 'aID' and 'sID'
     '''
     teamTimeID = copy.deepcopy(teamTime)
     for a in teamTime.keys():
-        aID = findID(a, pathToDict, a_prefix)
+        aID = findID(a, kgDict, a_prefix)
         teamTimeID[aID] = teamTimeID.pop(a)
         # print(teamTimeID)
         for s in teamTime[a].keys():       # for each sensor of an agent
-            sID = findID(s, pathToDict, s_prefix, sensor = True)
+            sID = findID(s, kgDict, s_prefix, sensor = True)
             teamTimeID[aID][sID] = teamTimeID[aID].pop(s)
 	
     return teamTimeID
@@ -86,54 +149,207 @@ def line_with_string2(string, fp):
         if string in line:
             return line
 
-def findID(name, pathToDict, col_prefix, sensor = False):
-    ''' given a sensor name, convert name to sensor ID from output.dict 
+class KGDictionary:
+    ''' output.dict parsed once into ID <-> name hash maps, so that name resolution 
+    does not re-open and scan the dict file on every lookup
+    each line of output.dict looks like 'Sensor1512: BRLK'
+    '''
+    def __init__(self, pathToDict):
+        self.path = pathToDict
+        self.id2name = {}       # {'Sensor1512': 'BRLK'}
+        self.name2id = {}       # {'BRLK': 'Sensor1512'}
+        with open(pathToDict, 'rb') as file:
+            data = file.read()
+        self.version = hashlib.sha1(data).hexdigest()      # content hash of output.dict
+        for line in data.decode('latin-1').splitlines():
+            ID, sep, name = line.partition(':')
+            if not sep:
+                continue
+            name = name[1:].rstrip()
+            # keep the first match in the file (same as the old line-by-line scan)
+            self.id2name.setdefault(ID.strip(), name)
+            self.name2id.setdefault(name, ID.strip())
+
+    def findID(self, name, col_prefix, sensor = False):
+        ''' see extractJSON.findID '''
+        if sensor:
+            name, sensorIdx = name.split('__')
+
+        ID = self.name2id[name]                                 # 'BRLK' -> 'Sensor1512'
+        newID = col_prefix + ''.join(filter(str.isdigit, ID))   # 'Sensor1512' -> 's1512'
+
+        if sensor:
+            newID += '__' + sensorIdx
+        return newID
+
+    def findName(self, ID, col_name):
+        ''' see extractJSON.findName '''
+        newID = col_name + ''.join(filter(str.isdigit, ID))      # 's1512' -> 'Sensor1512'
+        return self.id2name[newID]                              # 'Sensor1512' -> 'BRLK'
+
+KG_CACHE_VERSION = 1      # bump when the pickled layout of KGDictionary changes
+
+def fileStamp(path):
+    ''' (size, mtime) of a file, used to check whether a cache built from it is stale
+    '''
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def fileHash(path):
+    ''' sha1 of a file's contents, read in chunks
+    '''
+    h = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def saveCache(cachePath, cached):
+    ''' pickle to a temporary file and move it into place, so readers never see half a cache
+    '''
+    tmpPath = cachePath + '.' + str(os.getpid()) + '.tmp'
+    try:
+        with open(tmpPath, 'wb') as file:
+            pickle.dump(cached, file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, cachePath)
+    except OSError:         # read-only directory etc.: run without a cache
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+def loadCache(cachePath):
+    ''' unpickle a cache file, None if it is missing or unreadable
+    '''
+    try:
+        with open(cachePath, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+def loadKGDict(pathToDict, useCache = True):
+    ''' parse output.dict into a KGDictionary that is passed to every stage of the pipeline
+    the parsed dictionary is pickled next to the dict (<pathToDict>.cache) and reused while the 
+    dict's size and mtime are unchanged. if only the mtime changed, the content hash decides
+    '''
+    cachePath = pathToDict + '.cache'
+    stamp = fileStamp(pathToDict)
+    cached = loadCache(cachePath) if useCache else None
+    if cached is not None and cached.get('cacheVersion') == KG_CACHE_VERSION:
+        kgDict = cached['kgDict']
+        kgDict.path = pathToDict
+        if cached['stamp'] == stamp:
+            return kgDict
+        if cached['stamp'][0] == stamp[0] and kgDict.version == fileHash(pathToDict):
+            # file was touched but not changed: refresh the stamp
+            saveCache(cachePath, {'cacheVersion': KG_CACHE_VERSION, 'stamp': stamp, 'kgDict': kgDict})
+            return kgDict
+
+    kgDict = KGDictionary(pathToDict)
+    if useCache:
+        saveCache(cachePath, {'cacheVersion': KG_CACHE_VERSION, 'stamp': stamp, 'kgDict': kgDict})
+    return kgDict
+
+ACCESS_INDEX_VERSION = 1      # bump when the layout of the access index files changes
+
+class AccessIndex:
+    ''' accesses.json converted once into
+        <pathTimeJSON>.events.npy   every rise/set event of the file, (time, isRise), read memory-mapped
+        <pathTimeJSON>.index        {(agent, sensor, target): (first, last+1) rows of its events}
+    so the windows of a few agents are read without parsing the whole JSON file
+    '''
+    EVENT = np.dtype([('time', np.float64), ('isRise', np.bool_)])
+
+    def __init__(self, pathTimeJSON, index, events):
+        self.path = pathTimeJSON
+        self.index = index
+        self.eventArray = events
+        self.stamp = None       # fileStamp of pathTimeJSON, set by loadAccessIndex
+
+    @classmethod
+    def build(cls, pathTimeJSON):
+        ''' parse the JSON file (once) into the index and the array of events
+        '''
+        with open(pathTimeJSON) as time_file:
+            dataTime = json.load(time_file)
+        index = {}
+        times = []
+        rises = []
+        for a, instrument in dataTime["output"].items():
+            for s, location in instrument.items():
+                for target, timeArray in location.items():
+                    first = len(times)
+                    for d in timeArray['timeArray']:
+                        times.append(d['time'])
+                        rises.append(d['isRise'])
+                    index[(a, s, target)] = (first, len(times))
+        events = np.empty(len(times), dtype = cls.EVENT)
+        events['time'] = times
+        events['isRise'] = rises
+        return cls(pathTimeJSON, index, events)
+
+    def events(self, agent, sensor, target):
+        ''' (isRise, time) arrays of output[agent][sensor][target]['timeArray'], KeyError if it is not in the file
+        '''
+        first, last = self.index[(agent, sensor, target)]
+        rows = np.array(self.eventArray[first:last])
+        return rows['isRise'], rows['time']
+
+# {pathTimeJSON: AccessIndex} already loaded in this process
+accessIndexMemo = {}
+
+def loadAccessIndex(pathTimeJSON, useCache = True):
+    ''' AccessIndex of an accesses file. the index files are written next to it and reused while the 
+    file's size and mtime are unchanged. if only the mtime changed, the content hash decides
+    '''
+    stamp = fileStamp(pathTimeJSON)
+    accessIndex = accessIndexMemo.get(pathTimeJSON)
+    if accessIndex is not None and accessIndex.stamp == stamp:
+        return accessIndex
+
+    indexPath = pathTimeJSON + '.index'
+    eventsPath = pathTimeJSON + '.events.npy'
+    cached = loadCache(indexPath) if useCache else None
+    accessIndex = None
+    if cached is not None and cached.get('cacheVersion') == ACCESS_INDEX_VERSION:
+        if cached['stamp'] == stamp or (cached['stamp'][0] == stamp[0] and cached['version'] == fileHash(pathTimeJSON)):
+            try:
+                events = np.load(eventsPath, mmap_mode = 'r')
+                if len(events) == cached['numEvents']:
+                    accessIndex = AccessIndex(pathTimeJSON, cached['index'], events)
+            except (OSError, ValueError):
+                pass
+            if accessIndex is not None and cached['stamp'] != stamp:
+                # file was touched but not changed: refresh the stamp
+                saveCache(indexPath, dict(cached, stamp = stamp))
+
+    if accessIndex is None:
+        accessIndex = AccessIndex.build(pathTimeJSON)
+        if useCache:
+            tmpPath = eventsPath + '.' + str(os.getpid()) + '.tmp.npy'
+            try:
+                np.save(tmpPath, accessIndex.eventArray)
+                os.replace(tmpPath, eventsPath)
+                saveCache(indexPath, {'cacheVersion': ACCESS_INDEX_VERSION, 'stamp': stamp, 'version': fileHash(pathTimeJSON),
+                                      'numEvents': len(accessIndex.eventArray), 'index': accessIndex.index})
+            except OSError:         # read-only directory etc.: keep the index in memory only
+                if os.path.exists(tmpPath):
+                    os.remove(tmpPath)
+
+    accessIndex.stamp = stamp
+    accessIndexMemo[pathTimeJSON] = accessIndex
+    return accessIndex
+
+def findID(name, kgDict, col_prefix, sensor = False):
+    ''' given a sensor name, convert name to sensor ID from output.dict (kgDict is a KGDictionary)
     if sensor = True, we have '__num' at the end of each name
     example: 'BRLK__1' -> 'Sensor1512' -> 's1512' -> 's1512__1'
     '''
-    # print(sensorName.split('~'))
-    if sensor:
-    	name, sensorIdx = name.split('__')
-
-    with  open(pathToDict, 'r',  encoding='latin-1') as file:
-        # matched_lines = [line for line in file.split('\n') if sensor in line]
-        matched_lines = line_with_string(name, file)      # 'sensorID: sensor name'
-        ID = matched_lines.split(':')[0]                    # 'BRLK' -> 'Sensor1512'
-
-    # 'Sensor1512' -> 's1512'
-    idx = 0
-    newID = ''
-    for char in ID:
-        idx +=1
-        if char.isdigit():
-            newID += char
-    newID = col_prefix + newID
-    newID = newID.rstrip()
-
-    if sensor:
-    	newID += '__' + sensorIdx
-    return newID
-
-def findName(ID, pathToDict, col_name):
-    ''' given a sensor ID, convert ID to sensor name from output.dict 
+    return kgDict.findID(name, col_prefix, sensor = sensor)
+
+def findName(ID, kgDict, col_name):
+    ''' given a sensor ID, convert ID to sensor name from output.dict (kgDict is a KGDictionary)
     example: 's1512' -> 'Sensor1512' -> 'BRLK'
     '''
-    # 's1512' -> 'Sensor1512'
-    idx = 0
-    newID = ''
-    for char in ID:
-        idx +=1
-        if char.isdigit():
-            newID += char
-    newID = col_name + newID
-
-    with open(pathToDict, 'r',  encoding='latin-1') as file:
-        # matched_lines = [line for line in file.split('\n') if sensor in line]
-        matched_lines = line_with_string2(newID, file)      # 'sensorID: sensor name'
-        name = matched_lines.split(':')[1]                    # 'Sensor1512' -> 'BRLK'
-    name = name[1:].rstrip()
-
-    return name
+    return kgDict.findName(ID, col_name)
 
 
 # -------- these three functions are used to sort strings with numbers at the end -------- 
@@ -155,46 +371,46 @@ def sort_nicely(l):
     l.sort(key=alphanum_key)
 # ----------------------------------------------------------------------------------------
 
-def generateAlist(team, pathToDict, prefix):
+def generateAlist(team, kgDict, prefix):
 	a_list = []
 	for a in list(team.keys()):
-		aID = findID(a, pathToDict, prefix)
+		aID = findID(a, kgDict, prefix)
 		a_list.append(aID)
 	sort_nicely(a_list)
 	return a_list
 
-def generateSlist(team, pathToDict, prefix):
+def generateSlist(team, kgDict, prefix):
 	s_list = set()
 	# s_list = []
 	for a in team.keys():
 		for i in range(len(team[a])):       # for each sensor of an agent
 			s = list(team[a][i].keys())[0]
-			sID = findID(s, pathToDict, prefix, sensor = True)
+			sID = findID(s, kgDict, prefix, sensor = True)
 			# s_list.add(sID+ "~"+s[:-1])
 			s_list.add(sID)
 	s_list = list(s_list)
 	sort_nicely(s_list)
 	return s_list
 
-def generateMlist(team, pathToDict, prefix):
+def generateMlist(team, kgDict, prefix):
 	m_list = set()
 	for a in team.keys():
 		for i in range(len(team[a])):       # for each sensor of an agent
 			s = list(team[a][i].keys())[0]
 			for m in list(team[a][i][s].keys()):
-				mID = findID(m, pathToDict, prefix)
+				mID = findID(m, kgDict, prefix)
 				m_list.add(mID)
 	m_list = list(m_list)
 	sort_nicely(m_list)
 	return m_list
 
-def generateASMlists(team, pathToDict, a_prefix, s_prefix, m_prefix):
-	a_list = generateAlist(team, pathToDict, a_prefix)
-	s_list = generateSlist(team, pathToDict, s_prefix)
-	m_list = generateMlist(team, pathToDict, m_prefix)
+def generateASMlists(team, kgDict, a_prefix, s_prefix, m_prefix):
+	a_list = generateAlist(team, kgDict, a_prefix)
+	s_list = generateSlist(team, kgDict, s_prefix)
+	m_list = generateMlist(team, kgDict, m_prefix)
 	return a_list, s_list, m_list
 
-def create_asDict(team, pathToDict, a_prefix, s_prefix):
+def create_asDict(team, kgDict, a_prefix, s_prefix):
 	''' convert team to only have agent and sensor IDs
 	{a1: [s1, s2], a2: [s1, s3, s4], ...}}
 	'''
@@ -203,13 +419,13 @@ def create_asDict(team, pathToDict, a_prefix, s_prefix):
 		sIDs = []
 		for i in range(len(team[a])):       # for each sensor of an agent
 			s = list(team[a][i].keys())[0]
-			sIDs.append(findID(s, pathToDict, s_prefix, sensor = True))
+			sIDs.append(findID(s, kgDict, s_prefix, sensor = True))
 		sort_nicely(sIDs)
-		aID = findID(a, pathToDict, a_prefix)
+		aID = findID(a, kgDict, a_prefix)
 		asDict[aID] = sIDs
 	return asDict
 
-def create_smDict(team, pathToDict, s_prefix, m_prefix):
+def create_smDict(team, kgDict, s_prefix, m_prefix):
 	''' convert team to only have sensor and measurement IDs
 	{s1: [[m1, P1]], s2: [[m2, P2]]], ...}}
 	'''
@@ -219,15 +435,15 @@ def create_smDict(team, pathToDict, s_prefix, m_prefix):
 			mIDs = []
 			s = list(team[a][i].keys())[0]
 			for m in list(team[a][i][s].keys()):
-				mIDs.append([findID(m, pathToDict, m_prefix), team[a][i][s][m]])
+				mIDs.append([findID(m, kgDict, m_prefix), team[a][i][s][m]])
 			# sort_nicely(mIDs)
-			sID = findID(s, pathToDict, s_prefix, sensor = True)
+			sID = findID(s, kgDict, s_prefix, sensor = True)
 			smDict[sID] = mIDs
 	# print('smDict', smDict)
 	return smDict
 
-def construct_asMatrix(team, pathToDict, num_row, num_col, a_prefix, s_prefix, a_list, s_list):
-    as_dict = create_asDict(team, pathToDict, a_prefix, s_prefix)
+def construct_asMatrix(team, kgDict, num_row, num_col, a_prefix, s_prefix, a_list, s_list):
+    as_dict = create_asDict(team, kgDict, a_prefix, s_prefix)
     mat = np.zeros((num_row,num_col))
     for n in range(num_row):
         for s in as_dict[a_prefix+ a_list[n][1:]]:
@@ -235,10 +451,10 @@ def construct_asMatrix(team, pathToDict, num_row, num_col, a_prefix, s_prefix, a
             mat[n][idx] = 1
     return mat
 
-def construct_msMatrix(team, pathToDict, num_row, num_col, m_prefix, s_prefix, m_list, s_list):
+def construct_msMatrix(team, kgDict, num_row, num_col, m_prefix, s_prefix, m_list, s_list):
 	''' each element in matrix is probability of sensor observing measurement 
 	'''
-	sm_dict = create_smDict(team, pathToDict, s_prefix, m_prefix)
+	sm_dict = create_smDict(team, kgDict, s_prefix, m_prefix)
 	mat = np.zeros((num_row,num_col))
 	for n in range(num_col):
 	    for s in sm_dict[s_prefix + s_list[n][1:]]:
@@ -246,10 +462,10 @@ def construct_msMatrix(team, pathToDict, num_row, num_col, m_prefix, s_prefix, m
 	        mat[idx][n] = s[1][0]
 	return mat
 
-def notMeasMat(team, pathToDict, relation_ms, num_m, num_s, m_prefix, s_prefix, m_list, s_list):
+def notMeasMat(team, kgDict, relation_ms, num_m, num_s, m_prefix, s_prefix, m_list, s_list):
 	# which sensors DO NOT take what measurements with what probability
 
-	# sm_dict = create_smDict(team, pathToDict, s_prefix, m_prefix)       # {s1: [[m1, P1]], s2: [[m2, P2]]], ...}}
+	# sm_dict = create_smDict(team, kgDict, s_prefix, m_prefix)       # {s1: [[m1, P1]], s2: [[m2, P2]]], ...}}
 	
 	sm_dict = {}   		# {s1: {m1: [P1], m2: [P2]}, s2: {m1: [P1]}, ...}}
 	for a in team.keys():
@@ -258,35 +474,21 @@ def notMeasMat(team, pathToDict, relation_ms, num_m, num_s, m_prefix, s_prefix,
 			m_dict = {}
 			s = list(team[a][i].keys())[0]
 			for m in list(team[a][i][s].keys()):
-				mID = findID(m, pathToDict, m_prefix)
+				mID = findID(m, kgDict, m_prefix)
 				m_dict[mID] = team[a][i][s][m]
-			sID = findID(s, pathToDict, s_prefix, sensor = True)
+			sID = findID(s, kgDict, s_prefix, sensor = True)
 			sm_dict[sID] = m_dict
 
 
 	probDict = {}    		# {'P1': [0.7, 0.6], 'P2': [0.8, 0.9]} 
 	# probSensorDict = {}   	# {'s1': {'P1': [0.7, 0.6]}, 's2': {'P2': [0.8, 0.9]}}
-	relation_ms_no_str = np.chararray((num_m, num_s),itemsize=10)
+	# relation_ms_no[m][s] = k: sensor s misses measurement m with probability (1-Pk), 0 if s doesn't take m
+	relation_ms_no = np.zeros((num_m, num_s), dtype = int)
 	idx = 0
-	# relation_ms_no = 1-relation_ms
 	for r in range(num_m):
 		for c in range(num_s):
-			if relation_ms[r][c] == 0:
-				relation_ms_no_str[r][c] = '1'
-			else:
-				# tempDict = {}
+			if relation_ms[r][c] != 0:
 				idx += 1
-				decimals = 3
-				relation_ms_no_str[r][c] = '1-P' + str(idx) #+ '/' + str(10**decimals) 
-				# print(sm_dict[s_list[c]])
-				# print(sm_dict[s_list[c]][m_list[r]])
+				relation_ms_no[r][c] = idx
 				probDict['P'+str(idx)] = sm_dict[s_list[c]][m_list[r]]
-				temp = sm_dict[s_list[c]]
-				# remove measurement to keep track of which measurements we've already assigned strings to
-				# temp.pop(0)
-				sm_dict[s_list[c]] = temp
-					# tempDict['P'+str(idx)] = sm_dict[s_list[c]][0][1]
-				sensor = s_list[c]
-				# probSensorDict['s'+str(s_list.index(sensor)+1)] = tempDict
-	relation_ms_no_str = relation_ms_no_str.decode("utf-8") 	# convert byte to string
-	return relation_ms_no_str, probDict
+	return relation_ms_no, probDict
@@ -3,11 +3,13 @@
 from bidict import bidict
 import numpy as np
 import itertools
-from extractJSON import findName, findID, findTimeBounds
-import time # to debug inefficiencies
+from extractJSON import findName, findID, findTimeBounds, mergeWindows
+from visibilityEngine import VisibilityEngine, sweepOverlap, windowSlots, slotsGuard
+import probEngine
 
 '''
 GENERATE FORMULAS FOR PROBABILITIES AS STRINGS INSTEAD OF DOUBLES TO PASS INTO PRISM
+(PROBABILITIES ARE KEPT AS probEngine.ProbExpr AND ONLY WRITTEN AS STRINGS WHEN THE MODEL IS SAVED)
 
 WE ASSUME THAT:
 - AGENTS CAN CHOOSE IF SENSORS ARE ON OR OFF
@@ -19,6 +21,59 @@ MDP HAS BEEN PRUNED TO REDUCE THE NUMBER OF STATES (AGENTS WITH NO OVERLAPPING V
  ###############################################################
  ####### FUNCTIONS FOR GENERATING STATES & PROBABILITIES #######
  ###############################################################
+
+# an a_s state is stored as a python int bitmask instead of a (num_a x num_s) matrix:
+# bit (row*num_s + col) is set if agent row has sensor col on (same order as state.flatten()).
+# 0 is the "no agents" state
+
+def mat2bits(state):
+    ''' (num_a x num_s) 0/1 matrix -> int bitmask
+    '''
+    bits = 0
+    for idx in np.flatnonzero(state):
+        bits |= 1 << int(idx)
+    return bits
+
+def bits2mat(bits, num_a, num_s):
+    ''' int bitmask -> (num_a x num_s) 0/1 matrix
+    '''
+    state = np.zeros(num_a*num_s)
+    state[bits2idx(bits)] = 1
+    return np.reshape(state, (num_a, num_s))
+
+def bits2idx(bits):
+    ''' flat indices of the set bits, in increasing order
+    '''
+    idx = []
+    while bits:
+        low = bits & -bits
+        idx.append(low.bit_length()-1)
+        bits ^= low
+    return idx
+
+def bits2rowcol(bits, num_s):
+    ''' [(row, col), ...] of the set bits, row-major
+    '''
+    return [divmod(idx, num_s) for idx in bits2idx(bits)]
+
+def bits2agents(bits, num_s):
+    ''' number of agents with at least one sensor on
+    '''
+    rowMask = (1 << num_s) - 1
+    num = 0
+    while bits:
+        if bits & rowMask:
+            num += 1
+        bits >>= num_s
+    return num
+
+def bits2action(bits, num_s, names):
+    ''' action label of a state, e.g. 'A149S375__1_A156S265__2' (or 'NOAGENTS')
+    '''
+    if not bits:
+        return 'NOAGENTS'
+    return '_'.join(names['act'][row][col] for row, col in bits2rowcol(bits, num_s))
+
 def getOverlap(a, b):
     ''' check for overlap between two intervals, 0 if no overlap
     '''
@@ -26,81 +81,91 @@ def getOverlap(a, b):
 
 def visibilityOverlap(range1, range2):
     ''' given two sensors visibilty ranges (ex:  [[0, 1], [4, 5]] and  [[2, 3], [3, 4], [5, 6], [6, 7]]),
-    check if they overlap at all
+    check if they overlap at all (sorted sweep over the windows, see visibilityEngine)
     '''
-    for w1 in range1:
-        for w2 in range2:
-            if getOverlap(w1,w2) != 0:
-                return True
-    return False
-
-def allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID):
-    '''generates all possible a_s matrix states ASSUMING AGENTS CAN CHOOSE WHICH OF ITS SENSORS ARE ON OR OFF'''
+    return sweepOverlap(mergeWindows(np.asarray(range1, dtype = int).reshape(-1, 2))[0].tolist(),
+                        mergeWindows(np.asarray(range2, dtype = int).reshape(-1, 2))[0].tolist())
+
+def symmetryClasses(relation_as, relation_ms, a_list, s_list, teamTimeID):
+    ''' equivalence classes of interchangeable (agent, sensor) pairs: same sensor (ID without the '__<num>' of
+    constructTeam), same probability for every measurement (column of relation_ms) and same visibility (time-slot
+    bitset). only pairs that are the only sensor of their agent are grouped, so swapping two of them does not
+    change numAgents either
+    returns [[(row, col), ...], ...], classes of 2 or more pairs, each sorted row-major (same order as allStates_as)
+    '''
+    classes = {}
+    for row, col in zip(*np.where(relation_as == 1)):
+        if relation_as[row].sum() != 1:
+            continue
+        key = (s_list[col].split('__')[0], tuple(relation_ms[:, col]), windowSlots(teamTimeID[a_list[row]][s_list[col]]))
+        classes.setdefault(key, []).append((int(row), int(col)))
+    return [pairs for pairs in classes.values() if len(pairs) > 1]
+
+def allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID, classes = ()):
+    '''generates all possible a_s states (as bitmasks) ASSUMING AGENTS CAN CHOOSE WHICH OF ITS SENSORS ARE ON OR OFF
+    a state is valid if all of its (agent, sensor) pairs are visible at the same time at some point (the AND of 
+    their time-slot bitsets is not 0). such a state is a clique of the pairwise overlap graph, so states are 
+    grown one pair at a time from the cliques, and invalid states are never built
+    (this is stricter than the pairwise overlap used before: a set of pairs that overlap two by two but are
+    never all visible at once is not a state anymore. such a state never had an enabled action, since its
+    guard is the AND of the visibility of all of its pairs, so the model behaves the same)
+    classes (see symmetryClasses) are quotiented to count-based states: the pairs of a class are interchangeable,
+    so only states where the pairs on are the first ones of their class are kept (k+1 states instead of 2^k
+    for a class of k pairs), each standing for every state with the same number of pairs on per class'''
     # states_array = [np.zeros((num_a, num_s))]   # include "no agent" state
     # a_list = ['a355', 'a368', 'a390', 'a471', 'a472', 'a560']
     # s_list = ['s742__1', 's935__1', 's1452__1', 's1588__1', 's1606__1', 's1606__2']
     # teamTimeID = {'a471': {'s1606__1': [[0, 7]]}, 'a472': {'s1606__2': [[0, 7]]}, 'a355': {'s742__1': [[1, 2]]}, 'a368': {'s1588__1': [[0, 1], [4, 5]]}, 'a390': {'s935__1': [[2, 3], [3, 4], [5, 6], [6, 7]]}, 'a560': {'s1452__1': [[0, 7]]}}
 
-    states_array = [np.zeros((num_a, num_s))]
-    lst_a = []
+    states_array = [0]
 
     # assemble list of indices of which rows and cols are 1
     rows, cols = np.where(relation_as == 1)    
-
-    for i in range(len(rows)):
-        lst_a.append([rows[i],cols[i]])
-
-    # combination of all the indices
-    combs = []
-    lst = range(len(lst_a))
-    for i in range(1, len(lst_a)+1):
-        els = [list(x) for x in itertools.combinations(lst_a, i)]
-        combs.extend(els)
-
-    # for each combination, set indices in that combination to be 1
-    for c in range(len(combs)):
-
-        # print('c',combs[c])
-        state = np.zeros((num_a, num_s))
-        check = []
-        for j in range(len(combs[c])):
-            # print('idx',combs[c][j])
-            agent = a_list[combs[c][j][0]]
-            sensor = s_list[combs[c][j][1]]
-            check.append([agent,sensor])
-            state[combs[c][j][0]][combs[c][j][1]] = 1
-        vis = True
-        if len(check) == 1:
-            states_array.append(state)
-        else:
-            
-            for s1 in range(len(check)):
-                for s2 in range(len(check)):
-                    if s1 != s2:
-                        range1 = teamTimeID[check[s1][0]][check[s1][1]]
-                        range2 = teamTimeID[check[s2][0]][check[s2][1]]
-                        vis = visibilityOverlap(range1, range2)
-                        # print(check[s1], range1, check[s2], range2, vis)
-                        if not vis:
-                            break
-                else:
-                    continue 
-                break
-        if vis:
+    lst_a = list(zip(rows, cols))
+    lst_bits = [1 << int(row*num_s + col) for row, col in lst_a]
+    visibility = VisibilityEngine(lst_a, a_list, s_list, teamTimeID)
+    adj, slots = visibility.adj, visibility.slots
+
+    # pair j of a class can only be added after the previous pair of its class (needs[j], -1 for the first ones)
+    position = dict(((int(row), int(col)), i) for i, (row, col) in enumerate(lst_a))
+    needs = [-1] * len(lst_a)
+    for pairs in classes:
+        for prev, pair in zip(pairs[:-1], pairs[1:]):
+            needs[position[pair]] = position[prev]
+
+    # level k holds the valid k-pair states as (indices into lst_a, bitmask of pairs that overlap with all of 
+    # them, common time slots). extending each state (taken in lexicographic order) with higher indices only 
+    # gives the (k+1)-pair states in lexicographic order, i.e. the same order as itertools.combinations
+    level = [((i,), adj[i], slots[i]) for i in range(len(lst_a)) if slots[i] and needs[i] < 0]
+    while level:
+        nextLevel = []
+        for clique, common, visible in level:
+            state = 0
+            for i in clique:
+                state |= lst_bits[i]
             states_array.append(state)
 
+            for j in range(clique[-1]+1, len(lst_a)):
+                if (common >> j) & 1 and visible & slots[j] and (needs[j] < 0 or needs[j] in clique):
+                    nextLevel.append((clique + (j,), common & adj[j], visible & slots[j]))
+        level = nextLevel
+
     # print('# of states: ',len(states_array))
     return states_array
 
 def allStates_as2(num_a, num_s, relation_as):
-    '''generates all possible a_s matrix states ASSUMING AGENTS CANNOT CHOOSE WHICH OF ITS SENSORS ARE ON OR OFF'''
-    states_array = [np.zeros((num_a, num_s))]
+    '''generates all possible a_s states (as bitmasks) ASSUMING AGENTS CANNOT CHOOSE WHICH OF ITS SENSORS ARE ON OR OFF'''
+    states_array = [0]
+    rowBits = [mat2bits(relation_as[row]) << (row*num_s) for row in range(num_a)]
     # generate all combos of a (for num_a = 2: [0 0]', [0,1]', [1,0]', [1,1]'')
-    allcombos_a = [np.reshape(np.array(i), (1, num_a)) for i in itertools.product([0, 1], repeat = 1*num_a)]
-
-    # for each combination, set indices in that combination to be 1
-    for c in range(len(allcombos_a)):
-        state = np.multiply(relation_as,np.transpose(allcombos_a[c]))
+    allcombos_a = itertools.product([0, 1], repeat = 1*num_a)
+
+    # for each combination, turn on every sensor of the agents in that combination
+    for combo in allcombos_a:
+        state = 0
+        for row in range(num_a):
+            if combo[row]:
+                state |= rowBits[row]
         states_array.append(state)
     return states_array
 
@@ -108,134 +173,60 @@ def allStates_as2(num_a, num_s, relation_as):
 def sensors_on(num_s, current_as):
     '''generates list of which sensors are currently on.
         1 x num_s, each element is 1 or 0'''
-    sensorsOn_array = []
-    for col in range(num_s):
-        if any(current_as[:,col]):      # if sensor is on
-            sensorsOn_array.append(1)
-        else:
-            sensorsOn_array.append(0)
-    return sensorsOn_array
+    rowMask = (1 << num_s) - 1
+    cols = 0
+    while current_as:           # OR all agent rows together
+        cols |= current_as & rowMask
+        current_as >>= num_s
+    return [(cols >> col) & 1 for col in range(num_s)]
 
 def prob_measZero(current_as, relation_ms_no, num_m, num_s, probDict):
     '''probability that all measurements = 0 given the current a_s state
     [p_m1 = 0, p_m2 = 0]
-    returns probability as a string
-    relation_ms_no is a string if we want P1, P2, etc. rather than the actual values'''
+    returns probabilities as ProbExpr (see probEngine)
+    relation_ms_no[m][s] is the index k of the constant Pk of sensor s for measurement m (0 if none)'''
 
     sensorsOn_array = sensors_on(num_s, current_as)
-    prob_array = np.chararray((num_m, num_s),itemsize=10)     #itemsize may need to increase depending on # of P's
-    # current probability that m_i = 0 for each sensor 
-    for row in range(num_m):
-        for col in range(num_s):
-            if sensorsOn_array[col]:   # if sensor is on
-                prob_array[row][col] = relation_ms_no[row][col]
-            else:
-                prob_array[row][col] = '0'
-    # print('prob array', prob_array)
-
-    # prob_array = relation_ms_no * sensorsOn_array # 
-    # multiply the non-zero probabilities in prob_array together 
-    # to get total probability for each m_i
-    for p in list(probDict.keys()):
-        exec(p + '=' + str(probDict[p][0]))
-
-    prob_m00 = []      
-    for m in range(num_m):
-        total_prob = ''
-        for s in range(num_s):
-            prob = (prob_array[m][s]).decode("utf-8")   # convert byte to string
-            if prob != '0' and prob != '1':    # if prob = 1, we can ignore (no need to multiply it)
-                total_prob += '('+prob + ')'+'*'
-        if total_prob == '':
-            total_prob = '1*'
-        
-                # simplify expression
-        if eval(total_prob[:-1]) == 0:
-            total_prob = '0*'
-        elif eval(total_prob[:-1]) == 1:
-            total_prob = '1*'
-        prob_m00.append(total_prob[:-1])      # don't include last '*'
-    return prob_m00
+    return probEngine.missExprs(sensorsOn_array, relation_ms_no, probEngine.probValues(probDict))
 
 def measZero_all(numASM, relation_ms_no, allStates, probDict):
     '''Generates probabilities of m_i = 0 for all possible states, and
         creates a dictionary of {states_as:probabilities each m_i = 0}. states_as is 
-        flattened to be a list.'''
-
-    # prob_m00_array = []
+        the state bitmask.'''
 
     num_a, num_s, num_m = numASM
+    pVals = probEngine.probValues(probDict)
     prob_m00_dict = {}
-    # allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID)
     for state in allStates:
-        #state.setflags(write = False)
-        # flatten state and make it a tuple
-        prob_m00 = prob_measZero(state, relation_ms_no, num_m, num_s, probDict)
-        # prob_m00_array.append((state, prob_m00))
-        state_flat = tuple(state.flatten())
-        prob_m00_dict[state_flat] = prob_m00
+        sensorsOn_array = sensors_on(num_s, state)
+        prob_m00_dict[state] = probEngine.missExprs(sensorsOn_array, relation_ms_no, pVals)
 
     return prob_m00_dict
 
 
 def mProb_all(numASM, relation_as, current_as, measZero_dict, probDict):
     ''' find the probability each possible [m1, m2] given the current state. 
-        Returns mProb_dict, a dictionary {(m1, m2): probability}'''
+        Returns mProb_dict, a dictionary {(m1, m2): probability (ProbExpr)}'''
     
     num_a, num_s, num_m = numASM
-    for p in list(probDict.keys()):
-        exec(p + '=' + str(probDict[p][0]))
-    # generate all combos of m (for num_m = 2: [0 0], [0,1], [1,0], [1,1])
-    allcombos_m = [np.reshape(np.array(i), (1, num_m)) for i in itertools.product([0, 1], repeat = 1*num_m)]
-    # measZero_dict = measZero_all(num_a, num_s, relation_as)
-    # print('zero', measZero_dict)
-    current_flat = tuple(current_as.flatten())
-    # print(current_flat, measZero_dict[current_flat])
-
-    mProb_dict = {}
-    for c in range(len(allcombos_m)):
-        # P = 1
-        P = ''
-        combo = allcombos_m[c][0]
-
-        for m in range(num_m):
-            if not combo[m]:    # if m_i = 0 and the prob isn't 1
-                p_m = '(' + measZero_dict[current_flat][m] +')'
-            else:
-                # p_m = 1-measZero_dict[current_flat][m]
-                p_m = '(1-'+measZero_dict[current_flat][m] + ')'
-
-            if p_m == '(0)':         # if one probability is zero, then the product is also zero
-                P = '0'
-                break
-            if p_m != '(1)':        # no need to concatenate if mutiplying by 1
-                P += '*'+p_m
-        # mProb_dict[tuple(combo)] = round(P,10)
-
-        # simplify expression
-
-        if P == '':
-            P = '*1'
-        elif P == '0':
-            P = '*0'
-        elif eval(P[1:]) == 0:
-            P = '*0'
-        elif eval(P[1:]) == 1:
-            P = '*1'
-        mProb_dict[tuple(combo)] = P[1:]      # don't include the first '*'
-    return mProb_dict
+    return probEngine.outcomeExprs(measZero_dict[current_as], num_m)
 
 def allStates_asm(numASM, relation_as,relation_ms_no, allStates, probDict):
-    '''given all a_s states and m states, generate a nested dictionary {state a_s:{state m: probability}}'''
+    '''given all a_s states and m states, generate a nested dictionary {state a_s:{state m: probability}}
+    the probabilities of all the states are computed in one batch (probEngine.missBatch, probEngine.reachableOutcomes)
+    and only m states that can be reached (probability > 0) are included'''
     num_a, num_s, num_m = numASM
     allStates_dict = {}
-    measZero_dict = measZero_all(numASM, relation_ms_no, allStates, probDict)
     # allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID)
 
-    for state in allStates:
-        mProb_dict = mProb_all(numASM, relation_as, state, measZero_dict, probDict)
-        state_as = tuple(state.flatten())
-        allStates_dict[state_as] = mProb_dict
+    pVals = probEngine.probValues(probDict)
+    sensorsOn = np.array([sensors_on(num_s, state) for state in allStates]).reshape(len(allStates), num_s)
+    missVals = probEngine.missBatch(sensorsOn, relation_ms_no, pVals)     # (states x num_m)
+    outcomes = probEngine.reachableOutcomes(missVals)                     # only outcomes with P > 0
+
+    for i, state in enumerate(allStates):
+        measZero = probEngine.missExprs(sensorsOn[i], relation_ms_no, pVals, missVals[i])
+        allStates_dict[state] = probEngine.outcomeExprs(measZero, num_m, outcomes[i])
 
     return allStates_dict
 
@@ -243,47 +234,84 @@ def allStates_asm(numASM, relation_as,relation_ms_no, allStates, probDict):
  ################## FUNCTIONS FOR PRISM SYNTAX ################# 
  ###############################################################
 
-def names_as(numASM, row_prefix, col_prefix, relation_as): 
+def namingTable(prefixList, a_list, s_list, m_list, relation_as):
+    ''' every name written to the PRISM model, built once directly from the KG IDs 
+    (a_list = ['a149', ...], s_list = ['s375__1', ...], m_list = ['m520', ...]):
+        'as'        num_a x num_s state names, e.g. 'a149_s375__1' ('NaN' if the agent doesn't have the sensor)
+        'm'         measurement names, e.g. 'm520'
+        'act'       num_a x num_s action tokens, e.g. 'A149S375__1' (actions are tokens joined by '_')
+        'bit'       {state name or action token: bit of the a_s state bitmask}
+        'prefix'    prefixList, to look up IDs in the KG
+        'assign'    {prime: (zeros, ones, positions)} templates of assignment2str
+    '''
+    num_a, num_s = len(a_list), len(s_list)
+    names = {'as': [], 'm': list(m_list), 'act': [], 'bit': {}, 'prefix': prefixList, 'assign': {}}
+    for i in range(num_a):
+        names['as'].append([])
+        names['act'].append([])
+        for j in range(num_s):
+            act = "A" + a_list[i][1:] + "S" + s_list[j][1:]
+            names['act'][i].append(act)
+            names['bit'][act] = 1 << (i*num_s + j)
+            if relation_as[i][j]:
+                state = a_list[i] + "_" + s_list[j]
+                names['bit'][state] = 1 << (i*num_s + j)
+            else:
+                state = 'NaN'
+            names['as'][i].append(state)
+    return names
+
+def names_as(numASM, names): 
     '''outputs list of all agent and sensor state names'''
     num_a, num_s, num_m = numASM
     allStates = [] 
     for i in range(num_a): 
-        for j in range(num_s): 
-            if relation_as[i][j]:
-                state = row_prefix + str(i+1) + "_" + col_prefix + str(j+1) 
-                allStates.append(state)
-            else:
-                allStates.append('NaN') 
+        allStates += names['as'][i]
     return allStates 
 
-def names_m(num_m, m_prefix): 
+def names_m(num_m, names): 
     '''outputs list of all measurement names'''
-    allStates = [] 
-    for i in range(num_m): 
-        state = m_prefix + str(i+1)
-        allStates.append(state)          
-    return allStates 
+    return names['m'][:num_m]
 
-def init_states(numASM, prefixList, relation_as, a_list, s_list, teamTime, pathToDict):
+def assignment2str(state, names, prime = "'"):
+    ''' assignment of every a_s state name for a state bitmask, e.g. "(a149_s375__1' = 1) & (a149_s265__2' = 0)"
+    (prime = '' for the current state). the all-zero assignment is rendered once (names['assign']) and only the
+    set bits of the state are changed. the result is not kept: writeMDPfile renders each state once, so keeping
+    them would hold the whole model in memory
+    '''
+    if prime not in names['assign']:
+        # [(flat idx, name)] of the valid a_s states, row-major
+        valid = [(i*len(row) + j, name) for i, row in enumerate(names['as']) for j, name in enumerate(row) if name != 'NaN']
+        names['assign'][prime] = (["(" + name + prime + " = 0)" for idx, name in valid],
+                                  ["(" + name + prime + " = 1)" for idx, name in valid],
+                                  {idx: k for k, (idx, name) in enumerate(valid)})
+    zeros, ones, pos = names['assign'][prime]
+
+    parts = list(zeros)
+    for idx in bits2idx(state):
+        parts[pos[idx]] = ones[pos[idx]]
+    return ' & '.join(parts)
+
+def init_states(numASM, names, relation_as, a_list, s_list, teamTime, kgDict):
     ''' string of initialized states, assuming we always initialize with everything = 0 (all m_i = 1)'''
 
     # find which sensors are initially visible
     num_a, num_s, num_m = numASM
-    row_prefix, col_prefix, m_prefix = prefixList
+    row_prefix, col_prefix, m_prefix = names['prefix']
 
     vis_list = []
     for a in list(teamTime.keys()):
         for s in list(teamTime[a].keys()):
             if teamTime[a][s][0][0] == 0:      # if first element of time bounds = 0 (visible at beginning)
-                vis = findID(s, pathToDict, col_prefix, sensor = True)
-                visIdx = s_list.index(vis)+1
-                agent = findID(a, pathToDict, row_prefix)
-                agentIdx = a_list.index(agent)+1
-                vis_list.append(row_prefix + str(agentIdx) + '_'+col_prefix + str(visIdx))
+                vis = findID(s, kgDict, col_prefix, sensor = True)
+                visIdx = s_list.index(vis)
+                agent = findID(a, kgDict, row_prefix)
+                agentIdx = a_list.index(agent)
+                vis_list.append(names['as'][agentIdx][visIdx])
 
-    states_as = names_as(numASM, row_prefix, col_prefix,relation_as)
+    states_as = names_as(numASM, names)
     states_as = list(filter(lambda a: a != 'NaN', states_as))
-    states_m = names_m(num_m, m_prefix)
+    states_m = names_m(num_m, names)
 
     init_str = ""
 
@@ -302,29 +330,13 @@ def init_states(numASM, prefixList, relation_as, a_list, s_list, teamTime, pathT
     # init_str += 'numA: [0..'+ str(num_a) + '] init 0; \n'
     return init_str
 
-def current2str_as(num_a, num_s, current_as, row_prefix, col_prefix, relation_as):
-    '''returns a current a_s states in syntax suitable for PRISM
+def current2str_as(num_a, num_s, current_as, names, relation_as = None):
+    '''returns a current a_s state (bitmask) in syntax suitable for PRISM
     Example: ((a1_s1 = 1) & (a1_s2 = 0) & (a1_s3 = 0) & (a2_s1 = 0) & (a2_s2 = 0) & (a2_s3 = 0))
     NOT SURE IF I NEED THIS FUNCTION (CAN I JUST HAVE "TRUE"?)'''
-    num_a, num_s, num_m = numASM
-    all_str = ""
-    for a in range(num_a):
-        for s in range(num_s):
-            val = str(current_as[a][s])
-            states = names_as(numASM, row_prefix, col_prefix, relation_as)
-            states = np.reshape(states, (num_a, num_s))
-            if states[a][s] != 'NaN':
-                assignment = "(" + states[a][s] + " = " + val + ")"
-                all_str +=assignment
-
-            if a == (num_a-1) and s == (num_s-1):
-                break
-            else:
-                all_str += " & "
-    all_str = "(" + all_str + ")"
-    return all_str
+    return "(" + assignment2str(current_as, names, prime = '') + ")"
 
-def allCurrent2str_as(num_a, num_s, current_as, row_prefix, col_prefix,relation_as):
+def allCurrent2str_as(num_a, num_s, current_as, names, relation_as):
     '''returns all current a_s states in syntax suitable for PRISM
     Example: ((a1_s1 = 1) & (a1_s2 = 0) & (a1_s3 = 0) & (a2_s1 = 0) & (a2_s2 = 0) & (a2_s3 = 0))
              | ((a1_s1 = 1) & (a1_s2 = 0) & (a1_s3 = 0) & (a2_s1 = 0) & (a2_s2 = 0) & (a2_s3 = 1)) 
@@ -333,7 +345,7 @@ def allCurrent2str_as(num_a, num_s, current_as, row_prefix, col_prefix,relation_
     allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID)
     state_str = ""
     for state in range(len(allStates)):
-        assignment = current2str_as(num_a, num_s, allStates[state], row_prefix, col_prefix)
+        assignment = current2str_as(num_a, num_s, allStates[state], names)
         state_str += assignment
         if state == len(allStates)-1:
             break
@@ -341,28 +353,17 @@ def allCurrent2str_as(num_a, num_s, current_as, row_prefix, col_prefix,relation_
             state_str += "\n | "
     return state_str
 
-def next2str_as(numASM, current_as, row_prefix, col_prefix, relation_as):
+def next2str_as(numASM, current_as, names):
     '''returns the next a_s states in syntax suitable for PRISM
        (same as current2str_as but add apostrophes to each state)'''
-    num_a, num_s, num_m = numASM
-    all_str = ""
-    for a in range(num_a):
-        for s in range(num_s):
-            val = str(int(current_as[a][s]))
-            states = names_as(numASM, row_prefix, col_prefix, relation_as)
-            states = np.reshape(states, (num_a, num_s))
-            if states[a][s] != 'NaN':
-                assignment = "(" + states[a][s] + "' = " + val + ")"
-                all_str += assignment
-                all_str += " & "
-    return all_str[:-3]    # remove last ' & '
-
-def next2str_m(num_m, m_prefix):
+    return assignment2str(current_as, names)
+
+def next2str_m(num_m, names):
     '''returns a list of the current m states in syntax suitable for PRISM
-       output: {(0,0): '(m1' = 0) & (m2' = 0)'}
+       output: {(0,0): '(m520' = 0) & (m521' = 0)'}
     '''
     allcombos_m = [np.reshape(np.array(i), (1, num_m)) for i in itertools.product([0, 1], repeat = 1*num_m)]
-    names = names_m(num_m, m_prefix)
+    names = names_m(num_m, names)
     m_string = ""
     m_dict = {}
 
@@ -384,7 +385,7 @@ def next2str_m(num_m, m_prefix):
     return m_dict
 
 
-def allStates_next2str(numASM, a_list, s_list, relation_as,relation_ms_no, row_prefix, col_prefix, teamTimeID, probDict):
+def allStates_next2str(numASM, a_list, s_list, relation_as,relation_ms_no, names, teamTimeID, probDict):
     ''' Generates entire string for next states (the stuff after the arrow ->)
     Example: 
     0.3: (a1_s1' = 0) & (a1_s2' = 0) & (a1_s3' = 0) & (a2_s1' = 0) & (a2_s2' = 0) & (a2_s3' = 1) & (m1' = 0) & (m2' = 0)
@@ -396,12 +397,12 @@ def allStates_next2str(numASM, a_list, s_list, relation_as,relation_ms_no, row_p
     allStates_dict = allStates_asm(numASM, a_list, s_list, relation_as,relation_ms_no, teamTimeID, probDict)
     # {state a_s:{state m: probability}}
 
-    m_array = next2str_m (num_m, m_prefix)
+    m_array = next2str_m (num_m, names)
     count = 0 # sanity check
     prob_count = 0 # sanity check
     all_str = ""
     for state in allStates_dict.keys():
-        next_as = next2str_as(numASM, np.reshape(state, (num_a, num_s)), row_prefix, col_prefix, relation_as)
+        next_as = next2str_as(numASM, state, names)
         for m in allStates_dict[state].keys():
             #print('here', m)
             prob = allStates_dict[state][m]
@@ -417,9 +418,9 @@ def allStates_next2str(numASM, a_list, s_list, relation_as,relation_ms_no, row_p
                     #-> need probability of transitioning a_s matrices (probability of an agent turning on a sensor)
     return count, prob_count, all_str
 
-def init_actions(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict):
-    '''string of initialized action states, which are "A1S1" or "A1S1_A2S2", etc.'''
-    actionStr, timeDict = action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False)
+def init_actions(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict):
+    '''string of initialized action states, which are "A149S375__1" or "A149S375__1_A156S265__2", etc.'''
+    actionStr, timeDict = action2str(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict, action = False)
     init_str = ""
     for a in actionStr:
         init_str += a + ": [0..1] init 0; \n" 
@@ -437,66 +438,65 @@ def sensorTimeBounds(teamTime, agent, sensor):
     ''' for each agent's sensor, construct visibility time constraints in PRISM syntax
     example:
     (((t >= 1) & t <= 5)) | ((t >= 10) & t <= 20))) & t < totalTime
+    (written from the time-slot bitset of its windows, see visibilityEngine)
+    '''
+    return slotsGuard(windowSlots(teamTime[agent][sensor]))
+
+def slotsTimeBounds(slots):
+    ''' '(((t >= 1) & (t < 5)) | ...)' of a time-slot bitset
     '''
-    timeStr = ''
-    # for s in team[agent].keys():
-    for bounds in teamTime[agent][sensor]:      # for each time bound
-        timeStr += '((t >= ' + str(bounds[0]) + ') & (t < ' + str(bounds[1]) + ')) | '
+    return '(' + slotsGuard(slots) + ')'
 
+def pairSlots(teamTime, agentID, sensorID, kgDict):
+    ''' time-slot bitset of an (agent, sensor) of a state, e.g. ('a1512', 's375__1')
+    '''
+    # convert ids to agent and sensor names
+    sID, sIdx = sensorID.split('__')
+    agent = findName(agentID, kgDict, 'Platform')
+    sensor = findName(sID, kgDict, 'Sensor') + '__'+ sIdx
+    return windowSlots(teamTime[agent][sensor])
+
+def pairTimeBounds(teamTime, agentID, sensorID, kgDict):
+    ''' '(((t >= 1) & (t < 5)) | ...)' for an (agent, sensor) of a state, e.g. ('a1512', 's375__1')
+    '''
+    return slotsTimeBounds(pairSlots(teamTime, agentID, sensorID, kgDict))
 
-    timeStr = timeStr[:-3]    # remove extra ' | '
-    return timeStr
+def actionLabels(allStates, num_s, names):
+    ''' ['[TO_<STATE1>]', ...] of the states, the same actions as action2str without building their time
+    bounds (writeMDPfile takes the guards from the availability table, see availFormulas)
+    '''
+    return ['[TO_' + bits2action(state, num_s, names) + ']' for state in allStates]
 
-def action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict, action = True, stateDict = False):
+def action2str(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict, action = True, stateDict = False):
     ''' write actions for each transition to a state. returns a list: ['TO_<STATE1>', 'TO_STATE2']
-    where <state1> could be something like "A1S1" for [[1 0 0 ], [0 0 0]] or "A1S1_A2S2" for [[1 0 0 ], [0 1 0]]
+    where <state1> could be something like "A149S375__1" for [[1 0 0 ], [0 0 0]] or "A149S375__1_A156S265__2" for [[1 0 0 ], [0 1 0]]
+    (names from namingTable)
     If action = false, then we remove the "TO_" from each state
     If time = True, then we output the time bounds for each state: {'A1S1': '(((t >= 1) & t <= 5)) | ((t >= 10) & t <= 20)))'}
+    (the merged windows where all the sensors of the state are visible, i.e. the AND of their time-slot bitsets)
+    If stateDict = True, then we output {state bitmask: action}
     '''
     # allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID)
     actions = []
     timeDict = {}
     act2matDict = {}
+    fragments = {}      # {(row, col): time-slot bitset of the agent's sensor}, each pair is only looked up once
 
     # print(allStates)
     for state in allStates:
-        act = ""
-        if not np.count_nonzero(state) and not action:     # if states all = 0
-            act += "NOAGENTS"
-            timeDict[act] = ''
-        elif not np.count_nonzero(state) and action:
-            act += "[TO_NOAGENTS]"
+        act = bits2action(state, num_s, names)
+        if action:          # if we want actions 
+            act = "[TO_" + act + "]"
+        if not state:       # if states all = 0
             timeDict[act] = ''
         else:
-            timeStr= ''
-            for row in range(num_a):
-                for col in range(num_s):
-                    if state[row][col]:
-                        agent = str(row+1)
-                        sensor = str(col+1)
-                        stateStr = (row_prefix + agent).capitalize() + (col_prefix + sensor).capitalize()
-                        if act == "":           # if first element
-                            if action:          # if we want actions 
-                                act += "[TO_" + stateStr
-                            else:
-                                act += stateStr
-                        else:
-                            act += "_" + stateStr
-
-                        # convert a1 -> a1512
-                        agentID = a_list[int(agent)-1]
-                        sensorID = s_list[int(sensor)-1]
-                        sID, sIdx = sensorID.split('__')
-                        # convert ids to agent and sensor names
-                        # pathToDict = '../KG_examples/outputs_KGMLN_1/output.dict'
-                        agent = findName(agentID, pathToDict, 'Platform')
-                        sensor = findName(sID, pathToDict, 'Sensor') + '__'+ sIdx
-                        # find time bounds
-                        timeStr += '(' + sensorTimeBounds(teamTime, agent, sensor) + ') & '
-            if action:
-                act = act + ']'
-            timeDict[act] = timeStr[:-3] # remove last ' & '
-            act2matDict[tuple(state.flatten())] = act
+            common = -1
+            for row, col in bits2rowcol(state, num_s):
+                if (row, col) not in fragments:
+                    fragments[(row, col)] = pairSlots(teamTime, a_list[row], s_list[col], kgDict)
+                common &= fragments[(row, col)]
+            timeDict[act] = slotsTimeBounds(common)
+            act2matDict[state] = act
 
         actions.append(act)
 
@@ -510,22 +510,23 @@ def action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list
     #     return actions
 
 
-def init_vis(num_a, num_s, teamTime,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict):
+def init_vis(num_a, num_s, teamTime,relation_as, names, a_list, s_list, kgDict):
     ''' find all states that can possibily be 1 at initial state
     '''
+    row_prefix, col_prefix, m_prefix = names['prefix']
     initStates = []
     # find which sensors are initially visible
     vis_list = []
     for a in list(teamTime.keys()):
         for s in list(teamTime[a].keys()):
             if teamTime[a][s][0][0] == 0:      # if first element of time bounds = 0 (visible at beginning)
-                vis = findID(s, pathToDict, col_prefix, sensor = True)
-                visIdx = s_list.index(vis)+1
-                agent = findID(a, pathToDict, row_prefix)
-                agentIdx = a_list.index(agent)+1
-                vis_list.append(row_prefix + str(agentIdx) + '_'+col_prefix + str(visIdx))
+                vis = findID(s, kgDict, col_prefix, sensor = True)
+                visIdx = s_list.index(vis)
+                agent = findID(a, kgDict, row_prefix)
+                agentIdx = a_list.index(agent)
+                vis_list.append(names['as'][agentIdx][visIdx])
 
-    states_as = names_as(num_a, num_s, row_prefix, col_prefix,relation_as)
+    states_as = names_as([num_a, num_s, 0], names)
     states_as = list(filter(lambda a: a != 'NaN', states_as))
 
     init_str = ""
@@ -542,62 +543,42 @@ def init_vis(num_a, num_s, teamTime,relation_as, row_prefix, col_prefix, a_list,
         raise ValueError ("The team fails at the initial timestep.")
     return initStates
 
-def init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict):
+def init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict):
     '''
     find all possible combinations for initial timestep
-    returns list of as_matrix arrays
+    returns list of a_s state bitmasks
     '''
-    # actionDict = action2str(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False, stateDict = True)
-    init_states = init_vis(num_a, num_s, teamTime,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
+    # actionDict = action2str(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict, action = False, stateDict = True)
+    init_states = init_vis(num_a, num_s, teamTime,relation_as, names, a_list, s_list, kgDict)
     
     states_array = []
-    init_statesMat = []
-    lst_a = []
 
-    # find matrices for each init_states 
+    # OR the states of all init_states (essentially the same as relation_as but only for initial timestep)
+    allOn = 0
     for i in init_states:
-        action = i.replace('_','').upper()
-        actionMat = action2state(num_a, num_s, row_prefix, col_prefix, action)
-        init_statesMat.append(actionMat)
+        allOn |= names['bit'][i]
 
-    # sum all these matrices (essentially the same as relation_as but only for initial timestep)
-    allOn = sum(init_statesMat)
+    # list of the bits that are 1
+    lst_a = [1 << idx for idx in bits2idx(allOn)]
 
-    # assemble list of indices of which rows and cols are 1
-    rows, cols = np.where(allOn == 1)    
-
-    for i in range(len(rows)):
-        lst_a.append([rows[i],cols[i]])
-
-    # combination of all the indices
-    combs = []
-    lst = range(len(lst_a))
+    # for each combination of the bits, set bits in that combination to be 1
     for i in range(1, len(lst_a)+1):
-        els = [list(x) for x in itertools.combinations(lst_a, i)]
-        combs.extend(els)
-
-    # for each combination, set indices in that combination to be 1
-    for c in range(len(combs)):
-        state = np.zeros((num_a, num_s))
-        for j in range(len(combs[c])):
-            # print('idx',combs[c][j])
-            state[combs[c][j][0]][combs[c][j][1]] = 1
-        states_array.append(state)
+        for comb in itertools.combinations(lst_a, i):
+            states_array.append(sum(comb))
     # print(len(states_array))
     return states_array
 
-def initTransition(numASM, teamTime,teamTimeID, allStates, allStates_dict, relation_as, prefixList, a_list, s_list, probDict, pathToDict):
+def initTransition(numASM, teamTime,teamTimeID, allStates, allStates_dict, relation_as, names, a_list, s_list, probDict, kgDict):
     '''
     [initial]    t = 0 -> p1: (a1_s1 = 1) & (a2_s1 = 1) & (t' = t+1)
                    + ...
     '''
     num_a, num_s, num_m = numASM
-    row_prefix, col_prefix, m_prefix = prefixList
 
-    states = init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
-    actionDict = action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False, stateDict = True)
+    states = init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict)
+    actionDict = action2str(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict, action = False, stateDict = True)
 
-    mDict= next2str_m(num_m, m_prefix)
+    mDict= next2str_m(num_m, names)
     mkey = tuple(1 for i in range(num_m))     # all m's are on
     mStr = mDict[mkey]
 
@@ -609,29 +590,29 @@ def initTransition(numASM, teamTime,teamTimeID, allStates, allStates_dict, relat
     # calculate sum of all probabilites to divide existing probablities by (ensures probs sum to 1)
     probDen = '( '
     for state in states:
-        prob = allStates_dict[tuple(state.flatten())][mkey]
-        if prob != '0':
-            probDen+= prob + ' + '
+        prob = allStates_dict[state].get(mkey)
+        if prob is not None and not prob.isZero():
+            probDen+= str(prob) + ' + '
     probDen = probDen[:-2] + ')'
     numAgents = {}
     # construct afterArrow string
     for state in states:
-        prob = allStates_dict[tuple(state.flatten())][mkey]
-        if prob != '0':
-            next_as = next2str_as(numASM, state, row_prefix, col_prefix, relation_as)
-            action = actionDict[tuple(state.flatten())]
+        prob = allStates_dict[state].get(mkey)
+        if prob is not None and not prob.isZero():
+            next_as = next2str_as(numASM, state, names)
+            action = actionDict[state]
 
             # calculate number of agents for each state
-            num = len(np.where(state.any(axis=1))[0])
+            num = bits2agents(state, num_s)
 
-            afterArrow += '( ' + prob + ' ) / ' + probDen + ': ' + next_as + ' & '+ mStr +" & (numA' = "+ str(num) +')' + " & (t' = t+1)" +  ' \n'+' '*8 + '+ '
+            afterArrow += '( ' + str(prob) + ' ) / ' + probDen + ': ' + next_as + ' & '+ mStr +" & (numA' = "+ str(num) +')' + " & (t' = t+1)" +  ' \n'+' '*8 + '+ '
 
             numAgents['[TO_'+action+']'] = num
     afterArrow = afterArrow[:-3] + ';'
 
     return beforeArrow + afterArrow
 
-def constructAction(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict): 
+def constructAction(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict): 
     '''example:      [
      [up]    (((t >= 1) & t <= 5)) | ((t >= 10) & t <= 20))) & t < totalTime       -> 1:(u'=1) & (t' = t+1);
      [up]    d=1 & (((t >= 1) & t <= 5)) | ((t >= 10) & t <= 20))) & t < totalTime -> 1:(d'=0) & (t' = t+1);
@@ -639,8 +620,8 @@ def constructAction(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a
      [up]    r=1 " "                                                               -> 1:(r'=0) & (t' = t+1);'''
     
     all_actionStr = ""
-    actions, statesDict = action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict)
-    # statesDict = action2str(num_a, num_s, teamTime, relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False, time = True)
+    actions, statesDict = action2str(num_a, num_s, teamTime, allStates, names, a_list, s_list, kgDict)
+    # statesDict = action2str(num_a, num_s, teamTime, relation_as, names, a_list, s_list, kgDict, action = False, time = True)
     states = list(statesDict.keys())
     nextT = " & (t' = t+1); \n"
     for a in range(len(actions)):
@@ -662,101 +643,74 @@ def constructAction(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a
         all_actionStr += "\n"
     return all_actionStr
 
-def action2state(num_a, num_s, row_prefix, col_prefix, action):
-    ''' given an action, generate corresponding state
-        Ex: input = "A1S1_A2S2", output = np.array([[1, 0, 0], [0,1,0]])'''
-    
-    # step 1: convert "A1S1_A2S2" into [[1, 1], [2, 2]]
-    elem_list = []
-    act = ""
-    state_list = []
-    idx = 0
-    if action == "[TO_NOAGENTS]" or action == "[NOAGENTS]":
-        return np.zeros((num_a, num_s))
-
-    action = action.lower()
-
-    for char in action:
-        idx +=1
-        if char.isdigit():
-            act += char
-        if char == col_prefix:   # if got all the digits of agent
-            if row_prefix == "":       # if there are no agents (e.g. just 'S1_S2')
-                elem_list.append(1)
-            else:
-                elem_list.append(int(act))
-            act = ""
-        if char == "_" or idx == len(action):    # if at the end of one state (got all the digits of sensor)
-            elem_list.append(int(act))
-            state_list.append(elem_list)
-
-            elem_list = []
-            act = ""
-    
-    # step 2: take each list within the list and use them as indices for where to place ones
+def action2state(num_a, num_s, names, action):
+    ''' given an action, generate corresponding state bitmask
+        Ex: input = "A149S375__1_A156S265__2", output = bitmask of np.array([[1, 0, 0], [0,1,0]])
+        names from namingTable'''
+    action = action.replace('[', '').replace(']', '').replace('TO_', '')
+    if action == "NOAGENTS":
+        return 0
 
-    state = np.zeros((num_a, num_s))
-    for s in state_list:
-        state[s[0]-1][s[1]-1] = 1
+    # each token starts with 'A' (sensor IDs only have digits and '_'), so split at every '_A'
+    state = 0
+    for act in action.replace('_A', ' A').split():
+        state |= names['bit'][act]
 
     return state
         
-def nextStatesFromAction(actions, timeDict, allStates_dict, numASM, relation_as, prefixList, probDict, pathToDict):
+def nextStatesFromAction(actions, timeDict, model, numASM, relation_as, names, probDict, kgDict):
     '''based on the action given, generate transition probabilities (aka generate everything after the "->" 
     outputs {["TO_<STATE>"]}: "<P:states>"}
 
     INPUTS: 
     actions, timeDict (from function action2str)
-    allStates_dict (from function allStates_asm)
+    model (TeamMDP from mdpModel.buildModel)
 
     '''
     # allStates_dict = allStates_asm(numASM, a_list, s_list, relation_as,relation_ms_no, teamTimeID, probDict)
-    # actions, timeDict = action2str(num_a, num_s, teamTime, teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
-    # # actionStates = action2str(num_a, num_s, teamTime, relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False)
+    # actions, timeDict = action2str(num_a, num_s, teamTime, teamTimeID,relation_as, names, a_list, s_list, kgDict)
+    # # actionStates = action2str(num_a, num_s, teamTime, relation_as, names, a_list, s_list, kgDict, action = False)
     # print('HERE1')
     num_a, num_s, num_m = numASM
-    row_prefix, col_prefix, m_prefix = prefixList
 
-    actionStates = [s.replace('TO_','') for s in actions] 
-    t = time.time()
     # {state a_s:{state m: probability}}
-    m_array = next2str_m (num_m, m_prefix)
-    count = 0
+    m_array = next2str_m (num_m, names)
     trans_dict = {}
-    for act in range(len(actions)):
-        trans_str = ""
-        state = action2state(num_a, num_s, row_prefix, col_prefix, actionStates[act])
-        next_as = next2str_as(numASM, state, row_prefix, col_prefix, relation_as)
-        for m in allStates_dict[tuple(state.flatten())].keys():
-            prob = allStates_dict[tuple(state.flatten())][m] 
-            # if count != 0:
-            #     trans_str += "\n        + "
-            if prob != '0':      # ignore 0 probability transitions
-                str_state = str(prob)+ ": " + next_as + " & " + str(m_array[m]) + " &  (t'= t+1) \n"
-                trans_str += str_state + "        + "
-                count += 1
-        trans_dict[actions[act]] = trans_str[:-11] + ';' + '\n'
-        # print(actions[act])
-        count = 0
-    elapsed = time.time() - t
-    # print('HERE2')
+    for action in actions:
+        trans_dict[action] = nextStateFromAction(action, model, numASM, relation_as, names, m_array)
     return trans_dict
 
-def entireLine4state(actions, timeDict, allStates_dict, numASM,prefixList, a_list, s_list, relation_as, probDict, pathToDict):     # needs a better name
+def nextStateFromAction(action, model, numASM, relation_as, names, m_array):
+    '''transition probabilities of a single action (everything after the "->"), see nextStatesFromAction
+    m_array is next2str_m(num_m, names)'''
+    num_a, num_s, num_m = numASM
+
+    state = action2state(num_a, num_s, names, action)
+    next_as = next2str_as(numASM, state, names)
+    trans = []
+    for m, prob in model.transitions(model.index[state]):      # 0 probability transitions are not stored
+        trans.append(str(prob)+ ": " + next_as + " & " + str(m_array[m]) + " &  (t'= t+1) ")
+    return '\n        + '.join(trans) + ';' + '\n'
+
+def entireLine4state(actions, timeDict, model, numASM, names, a_list, s_list, relation_as, probDict, kgDict):     # needs a better name
     ''' outputs entire line of agent transition: 
     (a1_s1 = 0 & ...) | (a1_s1 = 1 & ...) | ... -> (a1_s1' = 0 & ...) ...
     '''
-    # beforeArrow = allCurrent2str_as(num_a, num_s, current_as, row_prefix, col_prefix,relation_as)
+    # beforeArrow = allCurrent2str_as(num_a, num_s, current_as, names, relation_as)
 
-    # actions, timeDict = action2str(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict, action = True)
+    # actions, timeDict = action2str(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict, action = True)
     num_a, num_s, num_m = numASM
-    row_prefix, col_prefix, m_prefix = prefixList
 
-    trans_dict = nextStatesFromAction(actions, timeDict, allStates_dict, numASM, relation_as, prefixList, probDict, pathToDict)
+    return ''.join(actionCommands(actions, timeDict, model, numASM, names, relation_as))
 
-    all_str =""
+def actionCommands(actions, timeDict, model, numASM, names, relation_as):
+    ''' yields the PRISM command of each action, one at a time:
+    [TO_A149S375__1]   <time bounds> & t < finalTime  -> <P:states> + ...;
+    '''
+    num_a, num_s, num_m = numASM
+    m_array = next2str_m (num_m, names)
 
-    for action in trans_dict.keys():
+    for action in dict.fromkeys(actions):      # each action once, in order
         beforeArrow = timeDict[action]
         if beforeArrow == '':
             finalT = "t < finalTime "      
@@ -764,9 +718,7 @@ def entireLine4state(actions, timeDict, allStates_dict, numASM,prefixList, a_lis
             finalT = " & t < finalTime "
         beforeArrow +=finalT
 
-        all_str += "\n"+action + "   " + beforeArrow + " -> \n        " + trans_dict[action]
-
-    return all_str
+        yield "\n"+action + "   " + beforeArrow + " -> \n        " + nextStateFromAction(action, model, numASM, relation_as, names, m_array)
 
 def probConstants(probDict):
     '''  create string that looks like:
@@ -786,87 +738,81 @@ def timeConstants(missionLength):
     '''
     return 'const int finalTime = ' + str(missionLength) + '; \n'
 
-def findNumAgents(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict):
-    ''' for a given action ('A1S1_A1S2_A2S2'), determine number of agents
+def findNumAgents(num_a, num_s, allStates, names, a_list, s_list):
+    ''' for a given action ('A149S375__1_A149S375__2_A156S265__1'), determine number of agents
     outputs dictionary {action: <num of sats>}
     '''
-    allActions, timeDict = action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False)
     # allStates = allStates_as(num_a, num_s, relation_as)
 
     numAgents = {}
-    for action in allActions:
-        if action == 'NOAGENTS':
-            num = 0
-        else:
-            alist = set()
-            sensors = action.split('_')
-            for a in sensors:
-                agent = a.split('S')[0]
-                alist.add(agent)
-            num = len(alist)
-        numAgents['[TO_'+action+']'] = num
+    for state in allStates:
+        numAgents['[TO_'+bits2action(state, num_s, names)+']'] = bits2agents(state, num_s)
     return numAgents
 
-def initialCost(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict):
+def initialCost(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict):
     ''' rewards for initial timestep
     '''
     rewardStr = ''
-    states = init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
+    states = init_allStates(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict)
     for state in states:
         # calculate number of agents for each state
-        num = len(np.where(state.any(axis=1))[0])
+        num = bits2agents(state, num_s)
         rewardStr += '[initial]    numA = ' + str(num) + ' : numA; \n'
     return rewardStr
 
-def constructNumAgentsCost(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, m_list, pathToDict, moduleName):
+def constructNumAgentsCost(num_a, num_s, allStates, names, a_list, s_list, m_list, moduleName):
     ''' create rewards module for minimizing number of satellites
     ex:
-    [TO_A1S1]    allM : 1;
+    [TO_A149S375__1]    allM : 1;
     '''
     # costModule = '\n formula allM = ('
     # for m in m_list:
     #     costModule += m + '=1 & '
     # costModule = costModule[:-3] + '); \n '
 
-    costModule = '\n\n rewards "'+moduleName+'" \n'
-    # costModule += initialCost(num_a, num_s, teamTime,teamTimeID,relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
+    return ''.join(numAgentsCostLines(num_a, num_s, allStates, names, a_list, s_list, m_list, moduleName))
+
+def numAgentsCostLines(num_a, num_s, allStates, names, a_list, s_list, m_list, moduleName):
+    ''' yields the rewards module of constructNumAgentsCost one line at a time
+    '''
+    yield '\n\n rewards "'+moduleName+'" \n'
+    # costModule += initialCost(num_a, num_s, teamTime,teamTimeID,relation_as, names, a_list, s_list, kgDict)
 
-    acts, statesDict = action2str(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict, action = False)
-    numAgentsDict = findNumAgents(num_a, num_s, teamTime, allStates, row_prefix, col_prefix, a_list, s_list, pathToDict)
-    actions = list(statesDict.keys())
+    numAgentsDict = findNumAgents(num_a, num_s, allStates, names, a_list, s_list)
 
-    for act in actions:
-        if statesDict[act] == '':
-            time = "t < finalTime "
-        else:
-            time = statesDict[act] + " | t < finalTime "
-        time = ''
+    for action in actionLabels(allStates, num_s, names):
         # costModule += '[TO_'+act+']' + '    ' +'allM' + '\n        : 1' + '; \n'
-        costModule += '[TO_'+act+']' + '    ' + 'allM '+time+'' + ': ' + str(numAgentsDict['[TO_'+act+']']) + '; \n'
-    return costModule + 'endrewards \n \n'
+        yield action + '    ' + 'allM ' + ': ' + str(numAgentsDict[action]) + '; \n'
+    yield 'endrewards \n \n'
+
+def constructKGModule(actions, timeDict, model, numASM, names, a_list, s_list, teamTime, relation_as, relation_ms,probDict,kgDict,missionLength):
+    return ''.join(KGModuleLines(actions, timeDict, model, numASM, names, a_list, s_list, teamTime, relation_as, relation_ms,probDict,kgDict,missionLength))
 
-def constructKGModule(actions, timeDict, allStates_dict, numASM, prefixList, a_list, s_list, teamTime, relation_as, relation_ms,probDict,pathToDict,missionLength):
+def KGModuleLines(actions, timeDict, model, numASM, names, a_list, s_list, teamTime, relation_as, relation_ms,probDict,kgDict,missionLength):
+    ''' yields the KG module of constructKGModule piece by piece (header, then one command per action)
+    '''
     num_a, num_s, num_m = numASM
-    row_prefix, col_prefix, m_prefix = prefixList
 
     # add comment about relationship matrices
     comments = "// agent-sensor relationship matrix: " + str(relation_as.tolist()) + "\n// measurement-sensor matrix: " + str(relation_ms.tolist()) +"\n \n"
     const = probConstants(probDict) + timeConstants(missionLength)
-    states0 = init_states(numASM, prefixList,relation_as, a_list, s_list, teamTime, pathToDict)
+    states0 = init_states(numASM, names, relation_as, a_list, s_list, teamTime, kgDict)
 
-    # initTrans = initTransition(numASM, teamTime,teamTimeID,relation_as, relation_ms_no, prefixList, a_list, s_list, probDict, pathToDict)
-    KG_module = comments + "mdp \n \n " + const + "\n module KG \n\n" + states0 + "\n" + entireLine4state(actions, timeDict, allStates_dict, numASM, prefixList, a_list, s_list, relation_as, probDict, pathToDict) + '\n endmodule'
-    return KG_module + '\n'
+    # initTrans = initTransition(numASM, teamTime,teamTimeID,relation_as, relation_ms_no, names, a_list, s_list, probDict, kgDict)
+    yield comments + "mdp \n \n " + const + "\n module KG \n\n" + states0 + "\n"
+    for command in actionCommands(actions, timeDict, model, numASM, names, relation_as):
+        yield command
+    yield '\n endmodule' + '\n'
 
-def constructActionsModule(num_a, num_s, teamTime, teamTimeID, relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict):
-    actions0 = init_actions(num_a, num_s, teamTime, teamTimeID, relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict)
-    actions_module = "\n module actions \n \n" + actions0 + constructAction(num_a, num_s, teamTime, teamTimeID, relation_as, row_prefix, col_prefix, a_list, s_list, pathToDict) + '\n endmodule'
+def constructActionsModule(num_a, num_s, teamTime, teamTimeID, relation_as, names, a_list, s_list, kgDict):
+    actions0 = init_actions(num_a, num_s, teamTime, teamTimeID, relation_as, names, a_list, s_list, kgDict)
+    actions_module = "\n module actions \n \n" + actions0 + constructAction(num_a, num_s, teamTime, teamTimeID, relation_as, names, a_list, s_list, kgDict) + '\n endmodule'
     return actions_module 
 
-def constructEachPModule(numASM,a_list, s_list,teamTime, teamTimeID, relation_as, relation_ms_no,prefixList, probDict, pathToDict):
+def constructEachPModule(numASM,a_list, s_list,teamTime, teamTimeID, relation_as, relation_ms_no, names, probDict, kgDict):
     ''' each transition should be > 0.9
     '''
-    trans_dict = nextStatesFromAction(actions, timeDict, allStates_dict, numASM, relation_as, prefixList, probDict, pathToDict)
+    trans_dict = nextStatesFromAction(actions, timeDict, model, numASM, relation_as, names, probDict, kgDict)
     timeR = 'rewards "eachP"'
     for action in trans_dict.keys():
         # if c ==30:
@@ -881,37 +827,52 @@ def constructEachPModule(numASM,a_list, s_list,teamTime, teamTimeID, relation_as
     timeR += '\n endrewards \n \n'
     return timeR
 
-def replaceIdx(a_list, s_list, m_list, KG_module, reward_module):
-    # FIGURE OUT HOW TO REPLACE INDICES WITH A LIST OF REWARD MODULES *****
-    # replace indices with indices from KG (ex: a1 -> a980)
-    for i in range(len(a_list)):
-        KG_module = KG_module.replace("a" + str(i+1) +"_", a_list[i]+"_")
-        KG_module = KG_module.replace("A" + str(i+1) + "S", "A" + a_list[i][1:] + "S")
-        reward_module = reward_module.replace("A" + str(i+1) + "S", "A" + a_list[i][1:] + "S")
-
-    for i in range(len(s_list)):
-        KG_module = KG_module.replace("s" + str(i+1) +"'", s_list[i]+"'")
-        KG_module = KG_module.replace("s" + str(i+1) +":", s_list[i]+":")
-        KG_module = KG_module.replace("S" + str(i+1) +"_", "S" + s_list[i][1:] + "_")
-        KG_module = KG_module.replace("S" + str(i+1) +"]", "S" + s_list[i][1:] + "]")
-
-        reward_module = reward_module.replace("S" + str(i+1) +"_", "S" + s_list[i][1:] + "_")
-        reward_module = reward_module.replace("S" + str(i+1) + " =", "S" + s_list[i][1:] + " =")
-        reward_module = reward_module.replace("S" + str(i+1) +":", "S" + s_list[i][1:] + ":")
-        reward_module = reward_module.replace("S" + str(i+1) +"'", "S" + s_list[i][1:] + "'")
-        reward_module = reward_module.replace("S" + str(i+1) +"]", "S" + s_list[i][1:] + "]")
-        
-    for i in range(len(m_list)):
-        KG_module = KG_module.replace("m" + str(i+1) + ":", m_list[i] + ":")
-        KG_module = KG_module.replace("m" + str(i+1) + "'", m_list[i] + "'")
-
+def allMFormula(m_list):
+    ''' formula allM = (m1=1 & m2=1 & ...);
+    '''
     allM = '\n formula allM = ('
     for m in m_list:
         allM += m + '=1 & '
     allM = allM[:-3] + '); \n '
+    return allM
+
+def availFormulas(actions, model, numASM, names):
+    ''' guards of the actions from the availability table of the model (enabled, missionLength x actions), which
+    has few distinct columns: each one is declared once and its guard is shared by all of its actions
+        formula avail_1 = ((t >= 1) & (t < 5)) | ((t >= 10) & (t < 20));
+    returns (formulas, {action: 'avail_<k>'}). actions that are always available have no guard ('', i.e. only 
+    t < finalTime), like NOAGENTS
+    '''
+    num_a, num_s, num_m = numASM
+    slots, pattern = model.availability()
+    always = (1 << model.missionLength) - 1
+    formulaNames = {}
+    formulas = ''
+    for k in range(len(slots)):
+        if slots[k] != always:
+            formulaNames[k] = 'avail_' + str(len(formulaNames)+1)
+            formulas += 'formula ' + formulaNames[k] + ' = ' + slotsGuard(slots[k]) + '; \n '
+    guards = {}
+    for action in actions:
+        guards[action] = formulaNames.get(pattern[model.index[action2state(num_a, num_s, names, action)]], '')
+    return formulas, guards
+
+def writeMDPfile(mdpFile, actions, model, numASM, names, a_list, s_list, m_list, teamTime, relation_as, relation_ms, probDict, kgDict, missionLength, rewardsName, bufferSize = 1 << 20):
+    ''' stream the PRISM model (allM and avail_<k> formulas + KG module + number of agents rewards) to mdpFile 
+    one command at a time. same file as constructKGModule, constructNumAgentsCost and saveMDPfile, but the whole 
+    model is never held in memory and the time guards are shared (availFormulas). all names already are KG IDs
+    (names from namingTable)
+    model is the TeamMDP of the team (mdpModel.buildModel), actions from actionLabels (or action2str)
+    '''
+    num_a, num_s, num_m = numASM
 
-    KG_module = allM + KG_module
-    return KG_module, reward_module
+    formulas, guards = availFormulas(actions, model, numASM, names)
+    with open(mdpFile, 'w', buffering = bufferSize) as out:
+        out.write(allMFormula(m_list) + formulas)
+        for piece in KGModuleLines(actions, guards, model, numASM, names, a_list, s_list, teamTime, relation_as, relation_ms, probDict, kgDict, missionLength):
+            out.write(piece)
+        for piece in numAgentsCostLines(num_a, num_s, model.states, names, a_list, s_list, m_list, rewardsName):
+            out.write(piece)
 
 def saveMDPfile(modules, mdpFile):
 
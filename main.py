@@ -2,27 +2,23 @@
 
 # main file to run verification step
 import os
+import re
+import glob
+import copy
+import time
+from concurrent.futures import ProcessPoolExecutor
 import encodeMission
 from extractJSON import *
 from generate_MDP_pruned import *
 import parseADV
+import exportExplicit
+import mdpSolver
+from mdpModel import buildModel, dominatedActions
+from prismRunner import PrismRunner, modelArgs
+from resultCache import teamKey
+from visibilityEngine import teamSlots, slotWindows
 import random
 
-def callPRISM(MDPpath, propertyPath, outputPath, PRISMpath):
-    ''' run PRISM in terminal from PRISMpath (/Applications/prism-4.5-osx64/bin)
-    save output log in outputPath
-    '''
-    os.chdir(PRISMpath)
-    command = './prism ' + '-cuddmaxmem 4g ' + MDPpath + ' ' + propertyPath + ' > ' + outputPath
-    print(command)
-    os.system(command)
-
-def outputADV(MDPpath, propertyPath, PRISMpath):
-    # save adversary files
-    os.chdir(PRISMpath)
-    command = './prism ' + MDPpath + ' ' + propertyPath + '  -exportadvmdp adv.tra -exportprodstates prod.sta'
-    os.system(command)
-
 def outputResult(outputPath):
     with open(outputPath) as file:
         resultLine = line_with_string2('Result: ', file)
@@ -47,118 +43,286 @@ def constructTeam(team):
             team[a][i][s+'__'+str(num)] = team[a][i].pop(s)     # replace sensor with sensor__num
             allsensors.append(s)
 
-def checkTime(team,teamTimeID, m_list, pathToDict, s_prefix, m_prefix):
+def checkTime(team,teamTimeID, m_list, kgDict, s_prefix, m_prefix):
     '''
     which measurements are free during what time intervals given a team
-    output dictionary of {m: time intervals}
+    output dictionary of {m: time intervals}, e.g. {'m1': [[0, 4], [6, 7]]}
     '''
     # from extractJSON
 
-    # reconstruct teamTime ID so that it's only {sensor: [time interval]}
+    # reconstruct teamTime ID so that it's only {sensor: time-slot bitset}
     newTimeDict = {}
-    for a in teamTimeID.keys():
-        for s in teamTimeID[a]:
-            newTimeDict[s] = teamTimeID[a][s]
+    slots = teamSlots(teamTimeID)
+    for a in slots.keys():
+        for s in slots[a]:
+            newTimeDict[s] = slots[a][s]
 
     check = {}
     for m in m_list:
-        check[m] = []
+        check[m] = 0
 
-    sDict = create_smDict(team, pathToDict, s_prefix, m_prefix) # {s1: [[m1, P1]], s2: [[m2, P2]]], ...}}
+    sDict = create_smDict(team, kgDict, s_prefix, m_prefix) # {s1: [[m1, P1]], s2: [[m2, P2]]], ...}}
     for s in sDict.keys():
         for mp in sDict[s]:
             meas = mp[0]
-            a= newTimeDict[s]
-            check[meas]= sorted(check[meas] + a, key=lambda x: x[0])
+            check[meas] |= newTimeDict[s]       # covered whenever one of its sensors is visible
     # print(check)
-
-
-def main(team):
-   
-    # data from knowledge graph 
-    pathMissionJSON = 'mission.json'
-    pathTimeJSON = 'accesses.json'
-    pathToDict = '../KG_examples/outputs_KGMLN_1/output.dict'
-    ## FOR MOUNT YASUR MISSION
-    # pathTimeJSON = 'test_antoni/MountYasur.json'
-    # pathToDict = 'test_antoni/output.dict'
-    # bin directory of PRISM application
-    PRISMpath = '/Applications/prism-4.6/prism/bin'      
-
-    # name of files for PRISM (saved to current directory)
-    missionFile = "prop1.txt"             # specification
-    mdpFile = "KG_MDP1.txt"                   # MDP
-    outputFile = "output1.txt"            # output log
-
+    return dict((m, slotWindows(check[m])) for m in m_list)
+
+
+# data from knowledge graph 
+pathMissionJSON = 'mission.json'
+pathTimeJSON = 'accesses.json'
+pathToDict = '../KG_examples/outputs_KGMLN_1/output.dict'
+## FOR MOUNT YASUR MISSION
+# pathTimeJSON = 'test_antoni/MountYasur.json'
+# pathToDict = 'test_antoni/output.dict'
+# bin directory of PRISM application
+PRISMpath = '/Applications/prism-4.6/prism/bin'      
+
+def inputPaths():
+    ''' {'mission', 'accesses', 'kgDict', 'prism'}: the paths above, read when called. verify_teams passes them
+    to its workers explicitly, since a worker started with spawn (the default on macOS) re-imports this module
+    and would only see the defaults, not the values set by the caller
+    '''
+    return {'mission': pathMissionJSON, 'accesses': pathTimeJSON, 'kgDict': pathToDict, 'prism': PRISMpath}
+
+# name of files for PRISM (saved to the working directory of each team)
+missionFile = "prop1.txt"             # specification
+mdpFile = "KG_MDP1.txt"                   # MDP
+outputFile = "output1.txt"            # output log
+
+def generateModel(team, workDir, explicit = False, cache = None, solver = 'prism', paths = None):
+    ''' write the PRISM model and the mission property of a team to workDir
+    returns {'numASM': [# of agents, sensors, meas], 'states': # of a_s states, 'size': TeamMDP.size(), 
+             'model': path of the model, 'files': model files, 'property': path of the property file, 'key': key in the cache,
+             'symmetry': classes of interchangeable platforms (see generate_MDP_pruned.symmetryClasses)}
+    if the team is in cache (a ResultCache), its model files are copied to workDir instead and the cached 
+    entry is returned with 'cached' = True
+    solver = 'numpy' solves the MDP in process (mdpSolver) instead: no model is written and 'result' and 
+    'teams' and 'concrete' are returned too
+    paths are the input files (see inputPaths, the module globals if None)
+    '''
     # res1 = [random.randrange(0, 1000)/1000. for i in range(168)] 
     # res2 =     [random.randrange(0, 1000)/1000. for i in range(168)] 
 
     # team = {'GOES-17': [{'ABI': {'Cloud type': res1}    }], \
     #     'Metop-A': [{'IASI': {'Land surface temperature': res2}}]}
 
+    if paths is None:
+        paths = inputPaths()
     constructTeam(team)
-    target = findTarget(pathMissionJSON)
-    teamTime = findTimeBounds(team, target, pathTimeJSON)
+    kgDict = loadKGDict(paths['kgDict'])
+    target = findTarget(paths['mission'])
+    teamTime = findTimeBounds(team, target, paths['accesses'])
     
     prefixList = ['a', 's', 'm']
     a_prefix, s_prefix, m_prefix = prefixList
-    teamTimeID = generate_teamTimeID(pathToDict, teamTime, a_prefix, s_prefix)
+    teamTimeID = generate_teamTimeID(kgDict, teamTime, a_prefix, s_prefix)
     
-    a_list, s_list, m_list = generateASMlists(team, pathToDict, a_prefix, s_prefix, m_prefix)
+    a_list, s_list, m_list = generateASMlists(team, kgDict, a_prefix, s_prefix, m_prefix)
     numASM = [len(a_list), len(s_list), len(m_list)]
     num_a, num_s, num_m = numASM
 
     rewardList = ['numAgents']
     print('# of agents, sensors, meas: ',numASM)
 
-    checkTime(team, teamTimeID, m_list, pathToDict, s_prefix, m_prefix)
-
     # mission for PRISM
-    missionLength = encodeMission.findMissionLength(pathMissionJSON)
-    # missionPCTL = encodeMission.generateMissionPCTL(pathMissionJSON, m_list, missionFile, saveFile = True)
-    missionPCTL = encodeMission.generateMissionMulti(m_list, missionFile, rewardList, saveFile = True)
+    missionLength = encodeMission.findMissionLength(paths['mission'])
+
+    # a measurement no sensor can take before the end of the mission makes every adversary fail
+    coverage = checkTime(team, teamTimeID, m_list, kgDict, s_prefix, m_prefix)
+    uncovered = [m for m in m_list if not any(start < missionLength for start, end in coverage[m])]
+    if uncovered:
+        print('measurements never covered during the mission: ', uncovered)
+    propertyPath = os.path.abspath(os.path.join(workDir, missionFile))
+    # missionPCTL = encodeMission.generateMissionPCTL(pathMissionJSON, m_list, propertyPath, saveFile = True)
+    missionPCTL = encodeMission.generateMissionMulti(m_list, propertyPath, rewardList, saveFile = True, explicit = explicit)
+
+    key = None
+    if cache is not None:
+        key = teamKey(team, teamTime, missionLength, kgDict.version, missionPCTL, explicit)
+        entry = cache.get(key, workDir)
+        if entry is not None:
+            return dict(entry, property = propertyPath, key = key, cached = True)
     
     # relationship matrices
-    relation_as = construct_asMatrix(team, pathToDict, num_a, num_s, a_prefix, s_prefix, a_list, s_list)
-    relation_ms = construct_msMatrix(team, pathToDict, num_m, num_s, m_prefix, s_prefix, m_list, s_list)
+    relation_as = construct_asMatrix(team, kgDict, num_a, num_s, a_prefix, s_prefix, a_list, s_list)
+    relation_ms = construct_msMatrix(team, kgDict, num_m, num_s, m_prefix, s_prefix, m_list, s_list)
     
-    relation_ms_no, probDict = notMeasMat(team, pathToDict, relation_ms, num_m, num_s,  m_prefix, s_prefix, m_list, s_list)
+    relation_ms_no, probDict = notMeasMat(team, kgDict, relation_ms, num_m, num_s,  m_prefix, s_prefix, m_list, s_list)
+
+    # interchangeable (agent, sensor) pairs are quotiented to count-based states
+    classes = symmetryClasses(relation_as, relation_ms, a_list, s_list, teamTimeID)
+    symmetry = [[findName(a_list[row][len(a_prefix):], kgDict, 'Platform') for row, col in pairs] for pairs in classes]
+    if symmetry:
+        print('interchangeable platforms: ', symmetry)
 
     # modules for PRISM MDP
-    allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID)
-    num_states = len(allStates)    # total number of states
+    allStates = allStates_as(num_a, num_s, relation_as, a_list, s_list, teamTimeID, classes)
 
     allStates_dict = allStates_asm(numASM, relation_as,relation_ms_no, allStates, probDict)
-    actions, timeDict = action2str(num_a, num_s, teamTime, allStates, a_prefix, s_prefix, a_list, s_list, pathToDict)
 
-    KG_module = constructKGModule(actions, timeDict, allStates_dict, numASM, prefixList, a_list, s_list, teamTime, relation_as, relation_ms,probDict,pathToDict,missionLength)
+    # sparse model (transitions of each action, actions enabled at each t, rewards), read by every writer/solver
+    model = buildModel(allStates, allStates_dict, numASM, a_list, s_list, teamTimeID, missionLength)
+
+    # drop the states (actions) that can never be on the Pareto front
+    dominated = dominatedActions(model)
+    model = model.subset(np.flatnonzero(~dominated))
+    allStates = model.states
+    num_states = len(allStates)    # total number of states
+    print('# of dominated states removed: ', int(dominated.sum()), ' of ', len(dominated))
+
+    # names of the states and actions in the PRISM model (KG IDs)
+    names = namingTable(prefixList, a_list, s_list, m_list, relation_as)
+
+    if solver == 'numpy':
+        front = mdpSolver.solveTeam(model)
+        teams = parseADV.solverTeams(front, allStates, num_s, names, kgDict)
+        return {'numASM': numASM, 'states': num_states, 'size': model.size(), 'model': None, 'files': [], 'property': propertyPath, 'key': None,
+                'result': mdpSolver.formatResult(front), 'teams': teams, 'concrete': parseADV.concreteTeams(teams, symmetry)}
+
+    actions = actionLabels(allStates, num_s, names)
 
     rewardsName = rewardList[0]    # criteria we care about
-    rewards_module1 = constructNumAgentsCost(num_a, num_s, teamTime, allStates, a_prefix, s_prefix, a_list, s_list, m_list, pathToDict, rewardsName)
-    # rewards_module2 = constructEachPModule(num_a, num_s, num_m,a_list, s_list,teamTime, teamTimeID, relation_as, relation_ms_no,a_prefix, s_prefix, m_prefix, probDict, pathToDict)
-    KG_module, rewards_module1 = replaceIdx(a_list, s_list, m_list, KG_module, rewards_module1)
-
-    modules = [KG_module, rewards_module1]
-    saveMDPfile(modules, mdpFile)
-
-    # save PRISM files to current directory
-    current_dir = str(os.getcwd())
-    MDPpath = current_dir + '/' + mdpFile
-    propertyPath = current_dir + '/' + missionFile
-    outputPath = current_dir + '/' + outputFile    
-    callPRISM(MDPpath, propertyPath, outputPath, PRISMpath)
-    # change directory back
-    os.chdir(current_dir)
-    result = outputResult(outputPath)
-    
-    outputADV(MDPpath, propertyPath, PRISMpath)
-    # change directory back
-    os.chdir(current_dir)
+    # rewards_module2 = constructEachPModule(numASM, a_list, s_list, teamTime, teamTimeID, relation_as, relation_ms_no, names, probDict, kgDict)
+
+    MDPpath = os.path.abspath(os.path.join(workDir, mdpFile))
+    if explicit:
+        # .tra, .sta, .lab and .trew files of the MDP
+        MDPpath = MDPpath.rsplit('.', 1)[0]
+        exportExplicit.exportExplicit(MDPpath, model, names)
+        files = [MDPpath + ext for ext in ['.tra', '.sta', '.lab', '.trew']]
+    else:
+        # stream KG module + rewards module to the MDP file
+        writeMDPfile(MDPpath, actions, model, numASM, names, a_list, s_list, m_list, teamTime, relation_as, relation_ms, probDict, kgDict, missionLength, rewardsName)
+        files = [MDPpath]
+
+    return {'numASM': numASM, 'states': num_states, 'size': model.size(), 'model': MDPpath, 'files': files, 'property': propertyPath, 'key': key,
+            'symmetry': symmetry}
+
+def verifyTeam(team, workDir = '.', explicit = False, cache = None, solver = 'prism', paths = None):
+    ''' generate the MDP of a team and check it with PRISM. every file of the team (model, property, 
+    output log, adversaries) is saved in workDir, so teams in different directories can run at the same time
+    cache is a ResultCache (or None): a team that was already verified with the same inputs is not run again
+    solver = 'numpy' solves it in process with mdpSolver instead of PRISM (not cached, it is faster than a lookup)
+    paths are the input files and PRISM (see inputPaths, the module globals if None)
+    returns {'workDir', 'numASM', 'states', 'result' (PRISM's Pareto front line), 
+             'teams' (see parseADV.parseADVteams), 'concrete' (see parseADV.concreteTeams), 'cached', 'time' (s)}
+    '''
+    t_team = time.time()
+    if paths is None:
+        paths = inputPaths()
+    workDir = os.path.abspath(workDir)
+    os.makedirs(workDir, exist_ok = True)
+
+    if solver == 'numpy':
+        cache = None
+    model = generateModel(copy.deepcopy(team), workDir, explicit, cache, solver, paths)
+    if solver == 'prism' and not model.get('cached'):
+        outputPath = os.path.join(workDir, outputFile)
+        advPath = os.path.join(workDir, 'adv.tra')
+
+        # adversaries of an earlier run would be read by parseADVteams too
+        for f in glob.glob(os.path.join(workDir, 'adv*.tra')) + glob.glob(os.path.join(workDir, 'prod.sta')):
+            os.remove(f)
+
+        # Pareto front and adversaries in one PRISM run
+        model['result'] = PrismRunner(paths['prism']).run(modelArgs(model['model'], explicit), model['property'], outputPath, advPath)[0]
+        model['teams'] = parseADV.parseADVteams(loadKGDict(paths['kgDict']), workDir)
+        model['concrete'] = parseADV.concreteTeams(model['teams'], model['symmetry'])
+
+        if cache is not None:
+            entry = {'numASM': model['numASM'], 'states': model['states'], 'model': os.path.basename(model['model']),
+                     'result': model['result'], 'teams': model['teams'], 'concrete': model['concrete']}
+            cache.put(model['key'], entry, model['files'] + [outputPath])
+
+    return {'workDir': workDir, 'numASM': model['numASM'], 'states': model['states'], 'result': model['result'], 
+            'teams': model['teams'], 'concrete': model['concrete'], 'cached': bool(model.get('cached')), 'time': time.time() - t_team}
+
+def verifyTeamRow(name, team, workDir, explicit, cache = None, solver = 'prism', paths = None):
+    ''' verifyTeam for verify_teams: a team that fails (e.g. an agent not in the KG, PRISM error) gives a 
+    row with 'error' instead of stopping the other teams
+    '''
+    try:
+        row = verifyTeam(team, workDir, explicit, cache, solver, paths)
+    except Exception as e:
+        row = {'workDir': os.path.abspath(workDir), 'error': type(e).__name__ + ': ' + str(e)}
+    row['team'] = name
+    return row
+
+def teamDirs(names, baseDir):
+    ''' {name: baseDir/<name>} with the characters that are not safe in a path replaced by '_'. names that
+    would share a directory (e.g. 'a b' and 'a_b') get '_2', '_3', ... so that no two teams write their
+    adversaries to the same place
+    '''
+    dirs = {}
+    used = set()
+    for name in names:
+        safe = re.sub(r'[^\w.-]', '_', str(name))
+        unique, k = safe, 1
+        while unique in used:
+            k += 1
+            unique = safe + '_' + str(k)
+        used.add(unique)
+        dirs[name] = os.path.join(baseDir, unique)
+    return dirs
+
+def verify_teams(teams, workers = 1, baseDir = 'teams', explicit = False, cache = None, solver = 'prism', paths = None):
+    ''' verify many teams {name: team} at the same time with a pool of workers processes.
+    each team runs in its own working directory baseDir/<name>. cache is a ResultCache (or None)
+    solver is 'prism' or 'numpy' (see verifyTeam)
+    paths are the input files and PRISM (see inputPaths, the module globals of this process if None)
+    returns the table of results, one row (see verifyTeam) per team in the same order as teams
+    '''
+    if paths is None:
+        paths = inputPaths()        # resolved here, not in the workers
+    dirs = teamDirs(teams.keys(), baseDir)
+
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        futures = [pool.submit(verifyTeamRow, name, teams[name], dirs[name], explicit, cache, solver, paths) for name in teams.keys()]
+        return [f.result() for f in futures]
+
+def printTable(table):
+    ''' print the results of verify_teams, one line per team
+    '''
+    for row in table:
+        if 'error' in row:
+            print(row['team'], '   ERROR: ', row['error'])
+        else:
+            print(row['team'], '   # of agents, sensors, meas: ', row['numASM'], '   # of states: ', row['states'], 
+                  '   time: %.1fs' % row['time'], '(cached)   ' if row['cached'] else '   ', row['result'])
+
+def checkSolver(teams, baseDir = 'teams', paths = None):
+    ''' verify teams {name: team} with PRISM and with mdpSolver, and print how far apart their Pareto fronts are
+    returns {name: max distance between the fronts (see mdpSolver.frontDistance)}
+    '''
+    if paths is None:
+        paths = inputPaths()
+    distances = {}
+    dirs = teamDirs(teams.keys(), baseDir)
+    for name in teams.keys():
+        workDir = dirs[name]
+        prism = verifyTeam(teams[name], workDir, paths = paths)
+        numpy = verifyTeam(teams[name], workDir, solver = 'numpy', paths = paths)
+        distances[name] = float(mdpSolver.frontDistance(mdpSolver.parseResult(prism['result']), mdpSolver.parseResult(numpy['result'])))
+        print(name, '   PRISM (%.1fs): ' % prism['time'], prism['result'])
+        print(name, '   numpy (%.1fs): ' % numpy['time'], numpy['result'])
+        print(name, '   max distance between the fronts: ', distances[name])
+    return distances
+
+def main(team, explicit = False, cache = None, solver = 'prism'):
+    ''' explicit = True to give PRISM the model in its explicit formats (exportExplicit) instead of the
+    PRISM language, which skips building the model in PRISM. cache is a ResultCache (or None)
+    solver = 'numpy' to solve the MDP in process instead of with PRISM (mdpSolver)
+    '''
+    # save PRISM files (output log and adversaries too) to current directory
+    row = verifyTeam(team, '.', explicit, cache, solver)
 
     print('\n ===================== PARETO FRONT POINTS ===================== ')
-    print(result)
+    print(row['result'])
     print('\n ===================== POSSIBLE TEAMS ===================== ')
-    parseADV.parseADVmain(pathToDict, PRISMpath)
+    parseADV.printTeams(row['teams'], row['concrete'])
 
 if __name__== "__main__":
 
@@ -205,6 +369,9 @@ if __name__== "__main__":
     team_bench.update(team2)
     t_tot = time.time()
     main(team_bench)
+    # from resultCache import ResultCache
+    # printTable(verify_teams({'team1': team1, 'team2': team2, 'teama': teama, 'newteam': newteam}, workers = 4, cache = ResultCache('cache')))
+    # checkSolver({'team1': team1, 'team2': team2, 'teama': teama})
     elapsed = time.time() - t_tot
     print('total time elapsed: ', elapsed)
     
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+'''
+MDP OF A TEAM AS SPARSE MATRICES, BUILT ONCE FROM allStates_as, allStates_asm AND THE VISIBILITY WINDOWS
+
+THE PRISM WRITER (generate_MDP_pruned.writeMDPfile), THE EXPLICIT EXPORTER (exportExplicit) AND THE IN-PROCESS
+SOLVER (mdpSolver) ALL READ THIS MODEL INSTEAD OF REBUILDING THEIR OWN FROM allStates_dict
+- ACTION i (TO_<STATE>) GOES TO a_s = states[i] AND EACH m WITH THE SAME PROBABILITIES FROM EVERY STATE, SO ITS
+  TRANSITION MATRIX IS ONE ROW: ROW i OF outcomes (actions x 2^num_m, CSR). COLUMN = m TUPLE AS A BINARY NUMBER, m1 FIRST
+- THE MODEL IS UNROLLED OVER t = 0 .. missionLength-1: enabled[t] IS THE MASK OF THE ACTIONS THAT CAN BE TAKEN AT t
+- cost[i] IS THE numAgents REWARD OF ACTION i, PAID IN STATES WHERE allM HOLDS
+'''
+
+import numpy as np
+import scipy.sparse as sp
+from generate_MDP_pruned import bits2agents, bits2idx
+from visibilityEngine import windowSlots
+
+def visibleBits(numASM, a_list, s_list, teamTimeID, missionLength):
+    ''' visible[t] = a_s bitmask of the (agent, sensor) pairs that are visible at timestep t,
+    i.e. bit t of the time-slot bitset of their windows is set
+    '''
+    num_a, num_s, num_m = numASM
+    visible = [0] * missionLength
+    for row in range(num_a):
+        for col in range(num_s):
+            slots = windowSlots(teamTimeID.get(a_list[row], {}).get(s_list[col], [])) & ((1 << missionLength) - 1)
+            for t in bits2idx(slots):
+                visible[t] |= 1 << (row*num_s + col)
+    return visible
+
+def mIndex(m):
+    ''' column of an m tuple, e.g. (1, 0, 1) -> 5 '''
+    col = 0
+    for b in m:
+        col = 2*col + b
+    return col
+
+def mTuple(col, num_m):
+    ''' m tuple of a column, e.g. 5 -> (1, 0, 1) for num_m = 3 '''
+    return tuple((col >> (num_m-1-k)) & 1 for k in range(num_m))
+
+class TeamMDP:
+    ''' numASM          [# of agents, sensors, meas]
+    missionLength   number of timesteps
+    states          a_s state (bitmask) of each action, in the order of allStates_as (0 = no agents)
+    index           {a_s state: action}
+    outcomes        (actions x 2^num_m) CSR matrix of the probabilities of the next m after each action
+                    (transitions with probability 0 are not stored)
+    exprs           ProbExpr of each stored probability (same order as outcomes.data), for the PRISM writer
+    enabled         (missionLength x actions) bool, action i can be taken at t
+    cost            (actions) number of agents of each action
+    '''
+
+    def __init__(self, numASM, missionLength, states, outcomes, exprs, enabled, cost):
+        self.numASM = numASM
+        self.missionLength = missionLength
+        self.states = states
+        self.index = dict((state, i) for i, state in enumerate(states))
+        self.outcomes = outcomes
+        self.exprs = exprs
+        self.enabled = enabled
+        self.cost = cost
+
+    def transitions(self, i):
+        ''' [(m tuple, ProbExpr), ...] of action i, by increasing m '''
+        first, last = self.outcomes.indptr[i], self.outcomes.indptr[i+1]
+        num_m = self.numASM[2]
+        return [(mTuple(int(col), num_m), self.exprs[k]) for k, col in zip(range(first, last), self.outcomes.indices[first:last])]
+
+    def success(self):
+        ''' probability that all measurements are taken after each action '''
+        return self.outcomes[:, self.outcomes.shape[1]-1].toarray().ravel()
+
+    def availability(self):
+        ''' distinct columns of enabled (the availability table): (slots, pattern), slots[k] is the time-slot bitset
+        of pattern k (bit t set if enabled at t), in order of first appearance, and pattern[i] the pattern of action i
+        '''
+        packed = np.packbits(self.enabled.T, axis = 1, bitorder = 'little')        # bit t of each action
+        rows, first, pattern = np.unique(packed, axis = 0, return_index = True, return_inverse = True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        slots = [int.from_bytes(rows[k].tobytes(), 'little') for k in order]
+        return slots, rank[np.ravel(pattern)]
+
+    def subset(self, keep):
+        ''' TeamMDP with only the actions keep (increasing indices), e.g. without the dominated ones '''
+        indptr = self.outcomes.indptr
+        exprs = [expr for i in keep for expr in self.exprs[indptr[i]:indptr[i+1]]]
+        return TeamMDP(self.numASM, self.missionLength, [self.states[i] for i in keep], self.outcomes[keep],
+                       exprs, self.enabled[:, keep], self.cost[keep])
+
+    def size(self):
+        ''' size of the model, without building it: # of actions, transitions per action (nonzeros of outcomes) and
+        density, and the reachable states, choices and transitions once unrolled (as in exportExplicit)
+        '''
+        perAction = np.diff(self.outcomes.indptr)
+        perT = self.enabled.astype(np.int64) @ perAction     # next states of each level (one per action and m)
+        choices = self.enabled.sum(axis = 1)
+        levels = np.concatenate(([1], perT))                 # states at t = 0 .. missionLength
+        return {'actions': len(self.states), 'outcomes': int(self.outcomes.nnz),
+                'density': self.outcomes.nnz / float(max(1, np.prod(self.outcomes.shape))),
+                'states': int(levels.sum()), 'choices': int((levels[:-1] * choices).sum() + levels[-1]),
+                'transitions': int((levels[:-1] * perT).sum() + levels[-1])}
+
+def buildModel(allStates, allStates_dict, numASM, a_list, s_list, teamTimeID, missionLength):
+    ''' TeamMDP of a team. allStates from allStates_as, allStates_dict from allStates_asm
+    '''
+    num_a, num_s, num_m = numASM
+    indptr = [0]
+    indices = []
+    data = []
+    exprs = []
+    for state in allStates:
+        for m, prob in allStates_dict[state].items():
+            if not prob.isZero():
+                indices.append(mIndex(m))
+                data.append(prob.value)
+                exprs.append(prob)
+        indptr.append(len(indices))
+    outcomes = sp.csr_matrix((np.array(data, dtype = float), np.array(indices, dtype = np.int64), np.array(indptr, dtype = np.int64)),
+                             shape = (len(allStates), 2**num_m))
+
+    visible = visibleBits(numASM, a_list, s_list, teamTimeID, missionLength)
+    enabled = np.array([[not state & ~visible[t] for state in allStates] for t in range(missionLength)], dtype = bool).reshape(missionLength, len(allStates))
+    cost = np.array([bits2agents(state, num_s) for state in allStates], dtype = float)
+    return TeamMDP(numASM, missionLength, list(allStates), outcomes, exprs, enabled, cost)
+
+def dominatedActions(model, tol = 1e-12):
+    ''' mask of the actions that can never be on the Pareto front of (max P(G allM), min E[numAgents]):
+    - actions that are never enabled (their common visibility starts after missionLength), except NOAGENTS
+    - action i is dominated by an action j that can be taken whenever i can (enabled), takes all the measurements
+      with at least the same probability (success) and uses at most as many agents (cost), e.g. a subset of its
+      sensors that covers the same measurements. j, randomized with NOAGENTS (success and cost 0, always enabled)
+      to get the success of i, gives the same P(G allM) for at most the same numAgents, so removing i does not
+      change the front. of equal actions, the first one is kept
+    actions are taken by increasing cost, then decreasing success and number of timesteps enabled, so the
+    actions that can dominate one are before it. dominance is transitive, so it is only compared with the actions kept so far
+    '''
+    success, cost = model.success(), model.cost
+    enabled = np.packbits(model.enabled.T, axis = 1)       # timesteps of each action, as bytes
+    dominated = ~model.enabled.any(axis = 0)
+    dominated[[i for i, state in enumerate(model.states) if not state]] = False
+
+    kept = np.zeros(len(cost), dtype = int)                # indices of the actions kept so far
+    numKept = 0
+    width = model.enabled.sum(axis = 0)                    # more timesteps first among equal actions
+    for i in np.lexsort((np.arange(len(cost)), -width, -np.round(success, 12), cost)):
+        if dominated[i]:
+            continue
+        prev = kept[:numKept]
+        covers = ((enabled[prev] & enabled[i]) == enabled[i]).all(axis = 1) & (success[prev] >= success[i] - tol)
+        if covers.any():
+            dominated[i] = True
+        else:
+            kept[numKept] = i
+            numKept += 1
+    return dominated
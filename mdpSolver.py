@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+'''
+SOLVE THE MDP OF A TEAM IN PROCESS WITH NUMPY, WITHOUT PRISM (FOR TEAMS WHOSE ACTIONS FIT IN MEMORY)
+
+SAME MODEL (mdpModel.TeamMDP) AS generate_MDP_pruned.writeMDPfile / exportExplicit AND SAME PROPERTY AS
+encodeMission.generateMissionMulti:
+    multi(Pmax=? [G allM], R{"numAgents"}min=? [ C ])
+- THE ACTIONS ENABLED AT t ONLY DEPEND ON t AND THE NEXT m ONLY ON THE ACTION, SO THE a_s AND m VARIABLES REDUCE TO
+  3 STATES PER t: GOOD (allM AND allM SO FAR), LATE (allM BUT NOT ALWAYS BEFORE) AND BAD (NOT allM).
+  G allM HOLDS IF THE PATH IS STILL GOOD AT finalTime. numAgents IS PAID IN GOOD AND LATE STATES (WHERE allM HOLDS)
+- EACH WEIGHTING wP*P(G allM) - wC*E[numAgents] OF THE OBJECTIVES IS SOLVED BY BACKWARD INDUCTION OVER t,
+  VECTORIZED OVER THE ACTIONS
+- THE PARETO FRONT IS THE CONVEX HULL OF THESE OPTIMA (AS IN PRISM, WHOSE ADVERSARIES CAN BE RANDOMIZED). ITS
+  VERTICES ARE FOUND BY SOLVING WITH THE WEIGHT NORMAL TO EACH SEGMENT BETWEEN TWO KNOWN VERTICES, UNTIL NO NEW ONE APPEARS
+'''
+
+import ast
+import numpy as np
+
+GOOD, LATE, BAD = 0, 1, 2
+
+# (next state if all measurements are taken, next state otherwise, numAgents paid) of each state
+NEXT = [(GOOD, BAD, 1), (LATE, BAD, 1), (LATE, BAD, 0)]
+
+def backwardInduction(success, cost, enabled, weights, tieBreak = (0., 0.), tol = 1e-12):
+    ''' success[i] = probability that all measurements are taken after action i, cost[i] its number of agents,
+    enabled[t, i] = action i can be taken at t (see mdpModel.TeamMDP)
+    optimal policy for max wP*P(G allM) - wC*E[numAgents], weights = (wP, wC). among the actions within tol of
+    the best one, the best for tieBreak = (tP, tC) is taken (e.g. the cheapest of the most likely)
+    returns (P, C, policy): P(G allM) and E[numAgents] of the policy, policy[t] = action taken at t in the good state
+    '''
+    wP, wC = weights
+    tP, tC = tieBreak
+    finalTime = len(enabled)
+    P = np.array([1., 0., 0.])          # at finalTime, G allM holds if the path is still good
+    C = np.zeros(3)
+    policy = np.zeros(finalTime, dtype = int)
+    for t in reversed(range(finalTime)):
+        act = np.flatnonzero(enabled[t])
+        s, c = success[act], cost[act]
+        nextP, nextC = np.zeros(3), np.zeros(3)
+        for state, (onAllM, onMiss, paid) in enumerate(NEXT):
+            Pa = s*P[onAllM] + (1-s)*P[onMiss]
+            Ca = paid*c + s*C[onAllM] + (1-s)*C[onMiss]
+            value = wP*Pa - wC*Ca
+            best = np.flatnonzero(value >= value.max() - tol*max(1., abs(value.max())))
+            k = best[np.argmax(tP*Pa[best] - tC*Ca[best])]
+            nextP[state], nextC[state] = Pa[k], Ca[k]
+            if state == GOOD:
+                policy[t] = act[k]
+        P, C = nextP, nextC
+    return P[GOOD], C[GOOD], policy
+
+def paretoFront(success, cost, enabled, tol = 1e-9):
+    ''' vertices [(P, C, policy), ...] of the Pareto front of (max P(G allM), min E[numAgents]), by increasing C
+    '''
+    low = backwardInduction(success, cost, enabled, (0., 1.), (1., 0.))     # cheapest, then most likely
+    high = backwardInduction(success, cost, enabled, (1., 0.), (0., 1.))    # most likely, then cheapest
+
+    def split(a, b):
+        ''' vertices strictly between a and b '''
+        wP, wC = b[1] - a[1], b[0] - a[0]
+        if wP <= tol or wC <= tol:
+            return []
+        x = backwardInduction(success, cost, enabled, (wP, wC), (1., 0.))
+        if wP*x[0] - wC*x[1] <= wP*a[0] - wC*a[1] + tol:
+            return []
+        return split(a, x) + [x] + split(x, b)
+
+    if high[0] - low[0] <= tol:
+        return [low]
+    return [low] + split(low, high) + [high]
+
+def solveTeam(model):
+    ''' Pareto front of a TeamMDP (see paretoFront and mdpModel.buildModel), policies are indices into model.states
+    '''
+    return paretoFront(model.success(), model.cost, model.enabled)
+
+def formatResult(front):
+    ''' 'Result: [(P1, C1), (P2, C2), ...]' like PRISM's Pareto front line
+    '''
+    return 'Result: [' + ', '.join('(' + repr(float(P)) + ', ' + repr(float(C)) + ')' for P, C, policy in front) + ']'
+
+def parseResult(resultLine):
+    ''' [(P, C), ...] of a 'Result: [...]' line (PRISM's or formatResult)
+    '''
+    points = resultLine.split(':', 1)[1]
+    points = points[:points.rindex(']')+1]
+    return [tuple(pt) for pt in ast.literal_eval(points.strip())]
+
+def frontDistance(points1, points2):
+    ''' max distance from a point of one front to the other front (its vertices and the segments between them)
+    '''
+    def toFront(pt, front):
+        front = sorted(front, key = lambda x: x[1])
+        dist = min(np.hypot(pt[0]-q[0], pt[1]-q[1]) for q in front)
+        for a, b in zip(front[:-1], front[1:]):
+            d = np.array([b[0]-a[0], b[1]-a[1]])
+            u = np.clip(np.dot([pt[0]-a[0], pt[1]-a[1]], d) / max(np.dot(d, d), 1e-300), 0, 1)
+            dist = min(dist, np.hypot(pt[0]-a[0]-u*d[0], pt[1]-a[1]-u*d[1]))
+        return dist
+    return max([toFront(pt, points2) for pt in points1] + [toFront(pt, points1) for pt in points2])
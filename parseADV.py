@@ -2,8 +2,10 @@
 
 # PARSE SYNTHESIZED PATH GENERATED FROM PRISM
 
-from extractJSON import findName
+from extractJSON import findName, loadKGDict
+from generate_MDP_pruned import bits2action
 import numpy as np
+import itertools
 import glob
 import main
 import ast
@@ -88,7 +90,7 @@ def generatePath(ADVfile, STAfile):
 			pathStates[t] = eachTime
 	return pathStates, actions, allP
 
-def convertAgents(actions, pathToDict, pathStates):
+def convertAgents(actions, kgDict, pathStates):
 	'''
 	convert actions in pathStates dictionary into agent names 
 	'''
@@ -103,7 +105,7 @@ def convertAgents(actions, pathToDict, pathStates):
 					new = a.split('S')
 					new = [idx for idx in new if idx[0] == 'A']
 					# print(new)
-					agent = findName(new[0][1:], pathToDict, 'Platform')
+					agent = findName(new[0][1:], kgDict, 'Platform')
 					# print(agent)
 					# act_new += new
 					agents.add(agent)
@@ -142,17 +144,20 @@ def calculateReward(actions, allP):
 		Pprev = allP[act]
 	return V
 
-def parseADVmain(pathToDict, PRISMpath):
+def parseADVteams(kgDict, PRISMpath):
+	''' teams of the adversaries in PRISMpath (the directory with adv1.tra, adv2.tra, ... and prod.sta)
+	returns {(probability, reward): {'adv<i>.tra': pathStates}}, without duplicate adversaries
+	'''
 	teams = {}
 
-	num = len(glob.glob1(PRISMpath,"*.tra"))     # number of adversary files
+	num = len(glob.glob1(PRISMpath,"adv*.tra"))     # number of adversary files
 	for i in range(num):
 		# print('\nadv' + str(i+1) + '.tra')
 		ADVfile = PRISMpath + '/adv' + str(i+1)+'.tra'
 		STAfile = PRISMpath + '/prod.sta'
 		pathStates, actions, allP = (generatePath(ADVfile,STAfile))
-		pathStates = convertAgents(actions, pathToDict, pathStates)
-		# print('Path: ',convertAgents(actions, pathToDict, pathStates))
+		pathStates = convertAgents(actions, kgDict, pathStates)
+		# print('Path: ',convertAgents(actions, kgDict, pathStates))
 		prob = np.prod(allP)
 		print(num, allP)
 		R = calculateReward(actions, allP)
@@ -161,11 +166,59 @@ def parseADVmain(pathToDict, PRISMpath):
 		# don't include duplicate adversaries
 		if (prob, R) not in teams.keys():
 			teams[(prob, R)] = {'adv' + str(i+1) + '.tra' : pathStates}
+	return teams
+
+def solverTeams(front, allStates, num_s, names, kgDict):
+	''' teams of the policies of mdpSolver.paretoFront, in the same format as parseADVteams:
+	{(probability, reward): {'policy<i>': pathStates}}. the path is the one where every measurement is taken
+	'''
+	teams = {}
+	for i in range(len(front)):
+		prob, R, policy = float(front[i][0]), float(front[i][1]), front[i][2]
+		actions = ['TO_' + bits2action(allStates[idx], num_s, names) for idx in policy]
+		pathStates = convertAgents(actions, kgDict, {})
+		if (prob, R) not in teams.keys():
+			teams[(prob, R)] = {'policy' + str(i+1) : pathStates}
+	return teams
 
+def concreteTeams(teams, classes):
+	''' classes of interchangeable platforms [[platform, ...], ...] (generate_MDP_pruned.symmetryClasses with
+	platform names): the model only uses the first platforms of a class, so c platforms of a class at a timestep
+	stand for any c platforms of the class. returns {(probability, reward): {t: [set of platforms, ...]}}, every
+	concrete team of each timestep, for the teams (see parseADVteams) that use a class
+	'''
+	expanded = {}
+	for team in teams.keys():
+		pathStates = list(teams[team].values())[0]
+		if not any(set(platforms) & set(agents) for platforms in classes for agents in pathStates.values()):
+			continue
+		expanded[team] = {}
+		for t in pathStates.keys():
+			others = set(pathStates[t])
+			choices = []
+			for platforms in classes:
+				num = len(others & set(platforms))
+				others -= set(platforms)
+				choices.append([set(combo) for combo in itertools.combinations(platforms, num)])
+			expanded[team][t] = [others.union(*combo) for combo in itertools.product(*choices)]
+	return expanded
+
+def printTeams(teams, concrete = None):
+	''' concrete teams from concreteTeams (if any)
+	'''
 	for team in teams.keys():
 		print('\n', list(teams[team].keys())[0])
 		print('Probability, Reward: ', team)
 		print(list(teams[team].values())[0])
+		if concrete and team in concrete:
+			print('Concrete teams: ', concrete[team])
+
+def parseADVmain(kgDict, PRISMpath):
+	''' PRISMpath is the directory with the adversary files (adv1.tra, adv2.tra, ... and prod.sta)
+	'''
+	teams = parseADVteams(kgDict, PRISMpath)
+	printTeams(teams)
+	return teams
 
 def paretoPlot(outputPath):
 	''' plot Pareto front
@@ -197,10 +250,10 @@ def paretoPlot(outputPath):
 
 if __name__== "__main__":
 	pathToDict = '../KG_examples/outputs_KGMLN_1/output.dict'
-	PRISMpath = '/Applications/prism-4.6/prism/bin'
+	advDir = '.'      # adversaries are saved next to the model (see main.py)
 	outputPath = "output1.txt"
 
-	parseADVmain(pathToDict, PRISMpath)
+	parseADVmain(loadKGDict(pathToDict), advDir)
 	print('\n')
 	paretoPlot(outputPath)
 
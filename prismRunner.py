@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+'''
+RUN PRISM AS A SUBPROCESS
+
+- NO os.chdir / os.system: PRISM IS CALLED WITH AN ARGUMENT LIST AND ITS OUTPUT IS STREAMED TO THE LOG FILE
+- THE PARETO RESULT AND THE ADVERSARY ARE COMPUTED IN THE SAME INVOCATION
+- NO WORKER POOL AND NO JVM REUSE: THE PRISM COMMAND LINE LOADS ONE MODEL PER RUN AND HAS NO SERVER MODE, SO THE
+  JVM STARTS ONCE PER TEAM. TEAMS RUN IN PARALLEL IN main.verify_teams (ONE PROCESS PER TEAM), AND mdpSolver
+  AVOIDS THE JVM ENTIRELY
+'''
+
+import os
+import subprocess
+
+def modelArgs(MDPpath, explicit = False):
+    ''' PRISM arguments to load the model: the PRISM language file, or
+    if explicit, the files written by exportExplicit (MDPpath without extension)
+    '''
+    if explicit:
+        return ['-importmodel', MDPpath + '.tra,sta,lab,trew', '-mdp']
+    return [MDPpath]
+
+class PrismRunner:
+    ''' PRISM runs of one installation (PRISMpath = bin directory, e.g. /Applications/prism-4.6/prism/bin)
+    cuddMaxMem      -cuddmaxmem of each run
+    javaMaxMem      -javamaxmem of each run (PRISM's default if None)
+    '''
+
+    def __init__(self, PRISMpath, cuddMaxMem = '4g', javaMaxMem = None):
+        self.prism = os.path.join(PRISMpath, 'prism')
+        self.cuddMaxMem = cuddMaxMem
+        self.javaMaxMem = javaMaxMem
+
+    def command(self, model, propertyPath, advPath = None):
+        ''' argument list of a PRISM run. model is from modelArgs, advPath is where adversaries
+        are exported (adv.tra -> adv1.tra, adv2.tra, ... for multi-objective properties, with prod.sta next to it)
+        '''
+        cmd = [self.prism, '-cuddmaxmem', self.cuddMaxMem]
+        if self.javaMaxMem is not None:
+            cmd += ['-javamaxmem', self.javaMaxMem]
+        cmd += list(model) + [propertyPath]
+        if advPath is not None:
+            cmd += ['-exportadvmdp', advPath, '-exportprodstates', os.path.join(os.path.dirname(advPath), 'prod.sta')]
+        return cmd
+
+    def run(self, model, propertyPath, outputPath, advPath = None):
+        ''' run PRISM once, streaming its output to outputPath. returns the 'Result: ' lines
+        (one per property in the property file)
+        '''
+        cmd = self.command(model, propertyPath, advPath)
+        results = []
+        with open(outputPath, 'w') as out:
+            proc = subprocess.Popen(cmd, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, universal_newlines = True)
+            for line in proc.stdout:
+                out.write(line)
+                if line.startswith('Result: '):
+                    results.append(line.rstrip('\n'))
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0 or not results:
+            raise ValueError('Error occurred when running PRISM. See ' + outputPath + ' for details.')
+        return results
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+'''
+PROBABILITY EXPRESSIONS FOR THE MDP TRANSITIONS
+
+EACH EXPRESSION IS STORED AS A LIST OF FACTORS OVER THE P CONSTANTS (P1, P2, ...) AND EVALUATED
+NUMERICALLY WITH NUMPY. IT IS ONLY TURNED INTO PRISM SYNTAX WHEN THE MODEL IS WRITTEN.
+
+relation_ms_no[m][s] = k   sensor s misses measurement m with probability (1-Pk)
+relation_ms_no[m][s] = 0   sensor s does not take measurement m
+'''
+
+import numpy as np
+import itertools
+
+class ProbExpr:
+    ''' product of factors over the P constants, e.g. ((1-P3)*(1-P7))*(1-(1-P4))
+    factors     tuple of (P indices, complemented). a factor is prod_k (1-Pk), or 1 - prod_k (1-Pk)
+                if complemented
+    value       numerical value of the whole product
+    factors that are exactly 1 are dropped, so an empty tuple means the expression is 1
+    '''
+    __slots__ = ('factors', 'value')
+
+    def __init__(self, factors, value):
+        self.factors = factors
+        self.value = value
+
+    def isZero(self):
+        return self.value == 0
+
+    def __str__(self):
+        ''' PRISM syntax '''
+        if self.value == 0:
+            return '0'
+        if self.value == 1 or not self.factors:
+            return '1'
+        terms = []
+        for idx, complemented in self.factors:
+            miss = '*'.join('(1-P' + str(k) + ')' for k in idx)
+            if complemented:
+                terms.append('(1-' + miss + ')')
+            else:
+                terms.append('(' + miss + ')')
+        return '*'.join(terms)
+
+    def __repr__(self):
+        return 'ProbExpr(' + str(self) + ' = ' + str(self.value) + ')'
+
+def probValues(probDict):
+    ''' {'P1': [0.7], 'P2': [0.8]} -> array([0., 0.7, 0.8]), indexed by the number of the P constant
+    (index 0 is "no sensor", i.e. P = 0 and 1-P = 1)
+    '''
+    pVals = np.zeros(len(probDict)+1)
+    for p in probDict.keys():
+        pVals[int(p[1:])] = probDict[p][0]
+    return pVals
+
+def missExprs(sensorsOn, relation_ms_no, pVals, vals = None):
+    ''' probability that each measurement is NOT taken given which sensors are on
+    sensorsOn is 1 x num_s (1 or 0). returns a list of num_m ProbExpr
+    vals are the numerical values if they are already known (see missBatch)
+    '''
+    on = np.flatnonzero(sensorsOn)
+    idx = relation_ms_no[:, on]                   # num_m x (# of sensors on)
+    if vals is None:
+        vals = np.prod(1 - pVals[idx], axis=1)
+
+    exprs = []
+    for m in range(len(idx)):
+        ks = tuple(int(k) for k in idx[m] if k)
+        if vals[m] == 1:
+            exprs.append(ProbExpr((), 1.))
+        else:
+            exprs.append(ProbExpr(((ks, False),), vals[m]))
+    return exprs
+
+def outcomeExprs(miss, num_m, outcomes = None):
+    ''' probability of each possible [m1, m2, ...] given the probabilities that each m_i = 0.
+    returns {(m1, m2, ...): ProbExpr}. outcomes that cannot happen (probability 0) are left out
+    outcomes = (combos, vals) if they are already known (see reachableOutcomes)
+    '''
+    missVals = np.array([e.value for e in miss])
+    if outcomes is None:
+        outcomes = reachableOutcomes(missVals.reshape(1, num_m))[0]
+    combos, vals = outcomes
+
+    # measurements that are certain (miss = 0) or impossible (miss = 1) have the same value in every 
+    # reachable outcome and their factor is 1, so only the free ones are written
+    free = [m for m in range(num_m) if 0 < missVals[m] < 1]
+
+    mProb_dict = {}
+    for c in range(len(combos)):
+        # m_i = 0 -> miss, m_i = 1 -> 1-miss
+        factors = tuple((miss[m].factors[0][0], bool(combos[c][m])) for m in free)
+        mProb_dict[tuple(int(b) for b in combos[c])] = ProbExpr(factors, vals[c])
+    return mProb_dict
+
+ ###############################################################
+ ############ BATCH COMPUTATION OVER ALL THE STATES ############
+ ###############################################################
+
+def missBatch(sensorsOn, relation_ms_no, pVals):
+    ''' probability that each measurement is NOT taken, for every state at once
+    sensorsOn is (states x num_s), 1 if the sensor is on in that state. returns (states x num_m)
+    the product over the sensors that are on is taken in log space as one matrix product
+    '''
+    sensorsOn = np.asarray(sensorsOn, dtype = float)
+    certain = (pVals == 1)[relation_ms_no]                    # (num_m x num_s) sensor never misses m
+    logQ = np.zeros(len(pVals))
+    logQ[pVals < 1] = np.log1p(-pVals[pVals < 1])
+    logMiss = sensorsOn @ logQ[relation_ms_no].T
+    miss = np.exp(logMiss)
+    miss[(sensorsOn @ certain.T) > 0] = 0
+    return miss
+
+def outcomeTable(miss):
+    ''' probability of every possible [m1, m2, ...] for every state, from missBatch
+    returns (states x 2^num_m), columns in the same order as itertools.product([0, 1], repeat = num_m)
+    '''
+    num_states, num_m = miss.shape
+    table = np.ones((num_states, 1))
+    for m in range(num_m):
+        # append m_i = 0 / m_i = 1 as the least significant digit of the column index
+        table = np.stack((table * miss[:, m:m+1], table * (1 - miss[:, m:m+1])), axis = 2).reshape(num_states, -1)
+    return table
+
+def reachableOutcomes(miss):
+    ''' the outcomes [m1, m2, ...] with non-zero probability for every state, from missBatch
+    a measurement that no sensor can take (miss = 1) is always 0 and a certain one (miss = 0) is always 1,
+    so only the 2^(# of free measurements) combinations of the others are enumerated. states with the
+    same free measurements are computed together with outcomeTable
+    returns a list over states of (combos, vals): combos is (outcomes x num_m) 0/1, vals the probabilities
+    '''
+    num_states, num_m = miss.shape
+    free = (miss > 0) & (miss < 1)
+    fixed = (miss == 0).astype(int)
+
+    groups = {}
+    for i in range(num_states):
+        groups.setdefault(free[i].tobytes(), []).append(i)
+
+    result = [None] * num_states
+    for rows in groups.values():
+        freeIdx = np.flatnonzero(free[rows[0]])
+        freeCombos = np.array(list(itertools.product([0, 1], repeat = len(freeIdx))), dtype = int).reshape(2**len(freeIdx), len(freeIdx))
+        vals = outcomeTable(miss[np.ix_(rows, freeIdx)])
+        for j in range(len(rows)):
+            combos = np.repeat(fixed[rows[j]].reshape(1, num_m), len(freeCombos), axis = 0)
+            combos[:, freeIdx] = freeCombos
+            result[rows[j]] = (combos, vals[j])
+    return result
+
+def benchmark(num_m, num_s = 12, num_states = 4000, seed = 0):
+    ''' time the per-state computation of all outcome probabilities against missBatch + outcomeTable
+    on a random team, and check that both give the same numbers
+    '''
+    import time
+    rng = np.random.default_rng(seed)
+    relation_ms = rng.random((num_m, num_s)) * (rng.random((num_m, num_s)) < 0.4)
+    relation_ms_no = np.zeros((num_m, num_s), dtype = int)
+    relation_ms_no[relation_ms != 0] = np.arange(1, np.count_nonzero(relation_ms)+1)
+    pVals = np.concatenate(([0.], relation_ms[relation_ms != 0]))
+    sensorsOn = rng.random((num_states, num_s)) < 0.3
+
+    # per state: same numerical work as missExprs + outcomeExprs, one state at a time
+    combos = np.array(list(itertools.product([0, 1], repeat = num_m)), dtype = bool)
+    t = time.time()
+    loopTable = []
+    for on in sensorsOn:
+        missVals = np.prod(1 - pVals[relation_ms_no[:, np.flatnonzero(on)]], axis = 1)
+        loopTable.append(np.prod(np.where(combos, 1-missVals, missVals), axis = 1))
+    tLoop = time.time() - t
+
+    t = time.time()
+    table = outcomeTable(missBatch(sensorsOn, relation_ms_no, pVals))
+    tBatch = time.time() - t
+
+    err = np.max(np.abs(loopTable - table))
+    print('# of meas: ', num_m, ' per state: %.3fs  batch: %.3fs  speedup: %.0fx  max diff: %.1e' % (tLoop, tBatch, tLoop/tBatch, err))
+    return tLoop, tBatch, err
+
+if __name__== "__main__":
+    for num_m in [4, 6, 8, 10]:
+        benchmark(num_m)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+'''
+CACHE OF GENERATED MDPS AND PRISM RESULTS, KEYED BY A HASH OF EVERYTHING THE RESULT DEPENDS ON
+
+EACH ENTRY IS A DIRECTORY <cacheDir>/<key>/ WITH THE MODEL FILES AND entry.pkl (PRISM RESULT, ADVERSARY TEAMS, ...).
+THE MTIME OF entry.pkl IS THE LAST TIME THE ENTRY WAS USED: WHEN THE CACHE IS LARGER THAN maxBytes, THE LEAST
+RECENTLY USED ENTRIES ARE REMOVED
+'''
+
+import os
+import json
+import shutil
+import hashlib
+from extractJSON import saveCache, loadCache
+
+RESULT_CACHE_VERSION = 7      # bump when the model or what is stored in an entry changes
+
+def teamKey(team, teamTime, missionLength, kgVersion, spec, explicit = False):
+    ''' canonical hash of a verification: team dict (after constructTeam, as generateModel hashes it), visibility windows of its
+    sensors (the slice of accesses.json it uses), mission length, KG dict version, property text
+    '''
+    parts = {'cacheVersion': RESULT_CACHE_VERSION, 'team': team, 'teamTime': teamTime, 'missionLength': missionLength,
+             'kg': kgVersion, 'property': spec, 'explicit': explicit}
+    text = json.dumps(parts, sort_keys = True, separators = (',', ':'), default = lambda x: x.tolist() if hasattr(x, 'tolist') else str(x))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+class ResultCache:
+    ''' cacheDir    directory of the cache (created if needed)
+        maxBytes    max total size of the entries on disk
+    '''
+
+    def __init__(self, cacheDir, maxBytes = 1 << 30):
+        self.cacheDir = os.path.abspath(cacheDir)
+        self.maxBytes = maxBytes
+        os.makedirs(self.cacheDir, exist_ok = True)
+
+    def entryPath(self, key):
+        return os.path.join(self.cacheDir, key)
+
+    def get(self, key, workDir = None):
+        ''' the stored entry of key (None if there is none). if workDir is given, the cached model files
+        are copied there
+        '''
+        entryPkl = os.path.join(self.entryPath(key), 'entry.pkl')
+        entry = loadCache(entryPkl)
+        if entry is None:
+            return None
+        try:
+            os.utime(entryPkl)      # most recently used
+            if workDir is not None:
+                for f in entry['files']:
+                    shutil.copyfile(os.path.join(self.entryPath(key), f), os.path.join(workDir, f))
+        except OSError:             # evicted in the meantime by another process
+            return None
+        return entry['data']
+
+    def put(self, key, data, files = ()):
+        ''' store data (anything that pickles) and copies of files under key, then evict old entries. the new
+        entry itself is never evicted, even if it alone is larger than maxBytes
+        '''
+        entryPath = self.entryPath(key)
+        tmpPath = entryPath + '.' + str(os.getpid()) + '.tmp'
+        try:
+            os.makedirs(tmpPath)
+            for f in files:
+                shutil.copyfile(f, os.path.join(tmpPath, os.path.basename(f)))
+            saveCache(os.path.join(tmpPath, 'entry.pkl'), {'files': [os.path.basename(f) for f in files], 'data': data})
+            os.rename(tmpPath, entryPath)
+        except OSError:             # already stored by another process, disk full, ...
+            shutil.rmtree(tmpPath, ignore_errors = True)
+        self.evict(keep = key)
+
+    def entries(self):
+        ''' [(last used, size in bytes, key)] of all the entries
+        '''
+        entries = []
+        for key in os.listdir(self.cacheDir):
+            entryPath = self.entryPath(key)
+            try:
+                used = os.stat(os.path.join(entryPath, 'entry.pkl')).st_mtime_ns
+                size = sum(os.path.getsize(os.path.join(entryPath, f)) for f in os.listdir(entryPath))
+            except OSError:         # temporary directory or removed in the meantime
+                continue
+            entries.append((used, size, key))
+        return entries
+
+    def evict(self, keep = None):
+        ''' remove least recently used entries until the cache fits in maxBytes (or only keep is left)
+        '''
+        entries = sorted(self.entries())
+        total = sum(size for used, size, key in entries)
+        for used, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.entryPath(key), ignore_errors = True)
+            total -= size
+
+    def clear(self):
+        for used, size, key in self.entries():
+            shutil.rmtree(self.entryPath(key), ignore_errors = True)
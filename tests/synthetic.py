@@ -0,0 +1,92 @@
+'''
+SMALL HAND-BUILT TEAMS FOR THE TESTS: THE INPUTS generateModel WOULD GET FROM THE KG AND accesses.json,
+WITHOUT THE KG (a_list, s_list AND m_list ARE ALREADY IDS, teamTimeID IS IN TIMESTEPS)
+'''
+
+import os
+import numpy as np
+from generate_MDP_pruned import allStates_as, allStates_asm, namingTable
+from mdpModel import buildModel
+from extractJSON import KGDictionary
+
+prefixList = ['a', 's', 'm']
+
+def relationMS(m_list, s_list, probs):
+    ''' relation_ms, relation_ms_no and probDict (as notMeasMat) of probs = {(m, s): P}
+    '''
+    relation_ms = np.zeros((len(m_list), len(s_list)))
+    relation_ms_no = np.zeros((len(m_list), len(s_list)), dtype = int)
+    probDict = {}
+    for r, m in enumerate(m_list):
+        for c, s in enumerate(s_list):
+            if (m, s) in probs:
+                relation_ms[r][c] = probs[(m, s)]
+                relation_ms_no[r][c] = len(probDict) + 1
+                probDict['P' + str(len(probDict) + 1)] = [probs[(m, s)]]
+    return relation_ms, relation_ms_no, probDict
+
+def syntheticTeam(a_list, s_list, m_list, sensors, probs, teamTimeID, missionLength):
+    ''' sensors = {agent: [sensor, ...]}, probs = {(m, s): P}, teamTimeID = {agent: {sensor: [[start, end], ...]}}
+    returns {'numASM', 'relation_as', 'relation_ms', 'relation_ms_no', 'probDict', 'names', 'teamTimeID', ...}
+    '''
+    numASM = [len(a_list), len(s_list), len(m_list)]
+    relation_as = np.zeros((len(a_list), len(s_list)))
+    for a, sList in sensors.items():
+        for s in sList:
+            relation_as[a_list.index(a)][s_list.index(s)] = 1
+    relation_ms, relation_ms_no, probDict = relationMS(m_list, s_list, probs)
+    return {'numASM': numASM, 'a_list': a_list, 's_list': s_list, 'm_list': m_list, 'relation_as': relation_as,
+            'relation_ms': relation_ms, 'relation_ms_no': relation_ms_no, 'probDict': probDict, 'teamTimeID': teamTimeID,
+            'missionLength': missionLength, 'names': namingTable(prefixList, a_list, s_list, m_list, relation_as)}
+
+def kgNames(team, dirPath):
+    ''' KGDictionary of the IDs of a synthetic team (written to dirPath/output.dict, agent a1 is 'Sat1' and sensor
+    s1__1 is 'Inst1__1') and teamTime, its teamTimeID by name
+    '''
+    pathToDict = os.path.join(dirPath, 'output.dict')
+    with open(pathToDict, 'w') as file:
+        for a in team['a_list']:
+            file.write('Platform' + a[1:] + ': Sat' + a[1:] + '\n')
+        for s in dict.fromkeys(s.split('__')[0] for s in team['s_list']):
+            file.write('Sensor' + s[1:] + ': Inst' + s[1:] + '\n')
+    teamTime = {}
+    for a, windows in team['teamTimeID'].items():
+        teamTime['Sat' + a[1:]] = dict(('Inst' + s[1:], w) for s, w in windows.items())
+    return KGDictionary(pathToDict), teamTime
+
+def teamModel(team, classes = ()):
+    ''' TeamMDP of a synthetic team (see generateModel), before the dominated actions are removed
+    '''
+    allStates = allStates_as(team['numASM'][0], team['numASM'][1], team['relation_as'], team['a_list'], team['s_list'],
+                             team['teamTimeID'], classes)
+    allStates_dict = allStates_asm(team['numASM'], team['relation_as'], team['relation_ms_no'], allStates, team['probDict'])
+    return buildModel(allStates, allStates_dict, team['numASM'], team['a_list'], team['s_list'], team['teamTimeID'], team['missionLength'])
+
+def smallTeam():
+    ''' 4 agents, 5 sensors, 3 measurements over 6 timesteps: an agent with 2 sensors, overlapping and disjoint
+    windows and a measurement only one sensor takes
+    '''
+    a_list = ['a1', 'a2', 'a3', 'a4']
+    s_list = ['s1__1', 's2__1', 's3__1', 's4__1', 's5__1']
+    m_list = ['m1', 'm2', 'm3']
+    sensors = {'a1': ['s1__1', 's2__1'], 'a2': ['s3__1'], 'a3': ['s4__1'], 'a4': ['s5__1']}
+    probs = {('m1', 's1__1'): 0.9, ('m2', 's1__1'): 0.6, ('m2', 's2__1'): 0.8, ('m1', 's3__1'): 0.7,
+             ('m3', 's3__1'): 0.95, ('m2', 's4__1'): 0.5, ('m3', 's4__1'): 0.85, ('m3', 's5__1'): 0.99}
+    teamTimeID = {'a1': {'s1__1': [[0, 4]], 's2__1': [[1, 6]]}, 'a2': {'s3__1': [[0, 2], [3, 6]]},
+                  'a3': {'s4__1': [[2, 5]]}, 'a4': {'s5__1': [[0, 6]]}}
+    return syntheticTeam(a_list, s_list, m_list, sensors, probs, teamTimeID, 6)
+
+def symmetricTeam():
+    ''' 3 agents with the same instrument (s6__1, s6__2, s6__3: same probabilities and windows) next to an agent
+    with 2 sensors and one with a shorter window of the same instrument
+    '''
+    a_list = ['a1', 'a2', 'a3', 'a4', 'a5']
+    s_list = ['s1__1', 's2__1', 's6__1', 's6__2', 's6__3', 's6__4']
+    m_list = ['m1', 'm2']
+    sensors = {'a1': ['s1__1', 's2__1'], 'a2': ['s6__1'], 'a3': ['s6__2'], 'a4': ['s6__3'], 'a5': ['s6__4']}
+    probs = {('m1', 's1__1'): 0.9, ('m2', 's2__1'): 0.7}
+    for s in s_list[2:]:
+        probs[('m2', s)] = 0.6
+    teamTimeID = {'a1': {'s1__1': [[0, 5]], 's2__1': [[0, 2], [3, 5]]}, 'a2': {'s6__1': [[0, 5]]},
+                  'a3': {'s6__2': [[0, 5]]}, 'a4': {'s6__3': [[0, 5]]}, 'a5': {'s6__4': [[1, 4]]}}
+    return syntheticTeam(a_list, s_list, m_list, sensors, probs, teamTimeID, 5)
@@ -0,0 +1,50 @@
+import os
+import json
+
+import extractJSON
+from extractJSON import loadKGDict, loadAccessIndex
+
+def writeFile(path, text, mtime_ns):
+    with open(path, 'w') as file:
+        file.write(text)
+    os.utime(path, ns = (mtime_ns, mtime_ns))
+
+def test_kg_dict_cache_follows_content(tmp_path):
+    path = str(tmp_path / 'output.dict')
+    writeFile(path, 'Platform1: Sat1\nSensor1: Inst1\n', 10**18)
+    first = loadKGDict(path)
+    assert first.findName('a1', 'Platform') == 'Sat1'
+    assert os.path.exists(path + '.cache')
+
+    # touched, same content: the cached dictionary is kept
+    os.utime(path, ns = (10**18 + 10**9, 10**18 + 10**9))
+    assert loadKGDict(path).version == first.version
+
+    # same size, other content
+    writeFile(path, 'Platform1: Sat2\nSensor1: Inst1\n', 10**18 + 2*10**9)
+    second = loadKGDict(path)
+    assert second.version != first.version
+    assert second.findName('a1', 'Platform') == 'Sat2'
+    assert loadKGDict(path, useCache = False).version == second.version
+
+def accessesText(times):
+    timeArray = [{'isRise': k % 2 == 0, 'time': t} for k, t in enumerate(times)]
+    return json.dumps({'output': {'Sat1': {'Inst1': {'Target': {'timeArray': timeArray}}}}})
+
+def test_access_index_follows_content(tmp_path):
+    path = str(tmp_path / 'accesses.json')
+    writeFile(path, accessesText([100.5, 200.5, 300.5, 400.5]), 10**18)
+    isRise, times = loadAccessIndex(path).events('Sat1', 'Inst1', 'Target')
+    assert list(times) == [100.5, 200.5, 300.5, 400.5] and list(isRise) == [True, False, True, False]
+    assert os.path.exists(path + '.index') and os.path.exists(path + '.events.npy')
+
+    # touched, same content: the index files are reused (also by a new process, without the memo)
+    os.utime(path, ns = (10**18 + 10**9, 10**18 + 10**9))
+    extractJSON.accessIndexMemo.clear()
+    assert list(loadAccessIndex(path).events('Sat1', 'Inst1', 'Target')[1]) == [100.5, 200.5, 300.5, 400.5]
+
+    # same size, other content
+    writeFile(path, accessesText([100.5, 250.5, 300.5, 400.5]), 10**18 + 2*10**9)
+    assert list(loadAccessIndex(path).events('Sat1', 'Inst1', 'Target')[1]) == [100.5, 250.5, 300.5, 400.5]
+    extractJSON.accessIndexMemo.clear()
+    assert list(loadAccessIndex(path).events('Sat1', 'Inst1', 'Target')[1]) == [100.5, 250.5, 300.5, 400.5]
@@ -0,0 +1,63 @@
+import mdpSolver
+import parseADV
+from generate_MDP_pruned import (actionLabels, action2str, availFormulas, allMFormula, constructKGModule,
+                                 constructNumAgentsCost, writeMDPfile, symmetryClasses)
+from synthetic import smallTeam, symmetricTeam, teamModel, kgNames
+
+def test_writer_matches_baseline(tmp_path):
+    team = smallTeam()
+    model = teamModel(team)
+    kgDict, teamTime = kgNames(team, str(tmp_path))
+    numASM, names, a_list, s_list, m_list = team['numASM'], team['names'], team['a_list'], team['s_list'], team['m_list']
+    num_a, num_s, num_m = numASM
+
+    actions = actionLabels(model.states, num_s, names)
+    mdpPath = str(tmp_path / 'KG_MDP1.txt')
+    writeMDPfile(mdpPath, actions, model, numASM, names, a_list, s_list, m_list, teamTime, team['relation_as'], team['relation_ms'],
+                 team['probDict'], kgDict, team['missionLength'], 'numAgents', bufferSize = 16)
+    with open(mdpPath) as file:
+        text = file.read()
+
+    # same text as the modules built as strings and saved in one piece
+    formulas, guards = availFormulas(actions, model, numASM, names)
+    modules = [allMFormula(m_list) + formulas,
+               constructKGModule(actions, guards, model, numASM, names, a_list, s_list, teamTime, team['relation_as'],
+                                 team['relation_ms'], team['probDict'], kgDict, team['missionLength']),
+               constructNumAgentsCost(num_a, num_s, model.states, names, a_list, s_list, m_list, 'numAgents')]
+    assert text == ''.join(modules)
+
+    # the actions are the ones of action2str, and each avail_<k> holds at the same t as the action's own time bounds
+    baseActions, timeDict = action2str(num_a, num_s, teamTime, model.states, names, a_list, s_list, kgDict)
+    assert baseActions == actions
+    definitions = {}
+    for line in formulas.split(';'):
+        if line.strip():
+            name, guard = line.split(' = ', 1)
+            definitions[name.split()[-1]] = guard
+    assert len(definitions) > 1
+    for action in actions:
+        for t in range(team['missionLength']):
+            written = eval(definitions[guards[action]], {'t': t}) if guards[action] else True
+            baseline = eval(timeDict[action], {'t': t}) if timeDict[action] else True
+            assert bool(written) == bool(baseline), (action, t)
+
+def test_symmetry_keeps_front():
+    team = symmetricTeam()
+    classes = symmetryClasses(team['relation_as'], team['relation_ms'], team['a_list'], team['s_list'], team['teamTimeID'])
+    assert classes == [[(1, 2), (2, 3), (3, 4)]]
+
+    full = teamModel(team)
+    quotient = teamModel(team, classes)
+    assert len(quotient.states) < len(full.states)
+    front = [(P, C) for P, C, policy in mdpSolver.solveTeam(full)]
+    assert len(front) > 1
+    assert mdpSolver.frontDistance(front, [(P, C) for P, C, policy in mdpSolver.solveTeam(quotient)]) < 1e-9
+
+def test_concrete_teams():
+    teams = {(0.5, 2.0): {'adv1.tra': {1: {'Sat2', 'Sat1'}, 2: {'Sat2', 'Sat3'}, 3: set()}},
+             (0.2, 1.0): {'adv2.tra': {1: {'Sat1'}}}}
+    concrete = parseADV.concreteTeams(teams, [['Sat2', 'Sat3', 'Sat4']])
+    assert list(concrete) == [(0.5, 2.0)]
+    assert concrete[(0.5, 2.0)][1] == [{'Sat1', 'Sat2'}, {'Sat1', 'Sat3'}, {'Sat1', 'Sat4'}]
+    assert concrete[(0.5, 2.0)][2] == [{'Sat2', 'Sat3'}, {'Sat2', 'Sat4'}, {'Sat3', 'Sat4'}]
+    assert concrete[(0.5, 2.0)][3] == [set()]
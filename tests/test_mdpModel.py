@@ -0,0 +1,25 @@
+import numpy as np
+
+import mdpSolver
+from mdpModel import dominatedActions
+from synthetic import smallTeam, teamModel
+
+def frontPoints(model):
+    return [(P, C) for P, C, policy in mdpSolver.solveTeam(model)]
+
+def shuffledWindows(team, seed):
+    ''' team with random windows for each of its sensors, some never visible during the mission '''
+    rs = np.random.default_rng(seed)
+    for windows in team['teamTimeID'].values():
+        for s in windows:
+            windows[s] = [[[0, 3], [4, 6]], [[1, 6]], [[0, 6]], [[0, 4]], [[2, 5]], [[7, 9]]][rs.integers(6)]
+    return team
+
+def test_dominance_keeps_front():
+    for seed in range(12):
+        team = smallTeam() if seed == 0 else shuffledWindows(smallTeam(), seed)
+        model = teamModel(team)
+        dominated = dominatedActions(model)
+        assert dominated.any() and not dominated[model.index[0]]
+        pruned = model.subset(np.flatnonzero(~dominated))
+        assert mdpSolver.frontDistance(frontPoints(model), frontPoints(pruned)) < 1e-9
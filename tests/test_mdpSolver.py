@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+import exportExplicit
+import mdpSolver
+from synthetic import smallTeam, teamModel
+
+def loadExplicit(basePath):
+    ''' allM and t of each state, choices {state: {choice: [(next, P), ...]}} and rewards {(state, choice): R}
+    of the files written by exportExplicit
+    '''
+    with open(basePath + '.sta') as file:
+        lines = file.read().splitlines()
+    cols = lines[0].strip('()').split(',')
+    mCols = [k for k, col in enumerate(cols) if col.startswith('m')]
+    allM, T = {}, {}
+    for line in lines[1:]:
+        state, values = line.split(':')
+        values = [int(v) for v in values.strip('()').split(',')]
+        allM[int(state)] = all(values[k] == 1 for k in mCols)
+        T[int(state)] = values[cols.index('t')]
+    choices = defaultdict(lambda: defaultdict(list))
+    with open(basePath + '.tra') as file:
+        for line in file.read().splitlines()[1:]:
+            src, choice, dst, prob = line.split()[:4]
+            choices[int(src)][int(choice)].append((int(dst), float(prob)))
+    rewards = defaultdict(float)
+    with open(basePath + '.trew') as file:
+        for line in file.read().splitlines()[1:]:
+            src, choice, dst, reward = line.split()
+            rewards[(int(src), int(choice))] = float(reward)
+    return allM, T, choices, rewards
+
+def valueIteration(allM, T, choices, rewards, weights, tieBreak):
+    ''' (P(G allM), E[numAgents]) of the best policy for wP*P - wC*C over (state, allM so far), tieBreak as in
+    mdpSolver.backwardInduction
+    '''
+    (wP, wC), (tP, tC) = weights, tieBreak
+    finalTime = max(T.values())
+    value = {}
+    for state in sorted(T, key = lambda s: -T[s]):
+        for good in (True, False):
+            if T[state] == finalTime:
+                value[(state, good)] = (float(good), 0.)
+                continue
+            best = None
+            for choice, succ in choices[state].items():
+                P = sum(p * value[(nxt, good and allM[nxt])][0] for nxt, p in succ)
+                C = rewards[(state, choice)] + sum(p * value[(nxt, good and allM[nxt])][1] for nxt, p in succ)
+                key = (round(wP*P - wC*C, 10), tP*P - tC*C)
+                if best is None or key > best[0]:
+                    best = (key, (P, C))
+            value[(state, good)] = best[1]
+    return value[(0, allM[0])]
+
+def explicitFront(basePath, tol = 1e-9):
+    ''' Pareto front of the explicit model, split the same way as mdpSolver.paretoFront '''
+    model = loadExplicit(basePath)
+    low = valueIteration(*model, (0., 1.), (1., 0.))
+    high = valueIteration(*model, (1., 0.), (0., 1.))
+
+    def split(a, b):
+        wP, wC = b[1] - a[1], b[0] - a[0]
+        if wP <= tol or wC <= tol:
+            return []
+        x = valueIteration(*model, (wP, wC), (1., 0.))
+        if wP*x[0] - wC*x[1] <= wP*a[0] - wC*a[1] + tol:
+            return []
+        return split(a, x) + [x] + split(x, b)
+
+    if high[0] - low[0] <= tol:
+        return [low]
+    return [low] + split(low, high) + [high]
+
+def test_solver_matches_value_iteration(tmp_path):
+    team = smallTeam()
+    model = teamModel(team)
+    basePath = str(tmp_path / 'KG_MDP1')
+    exportExplicit.exportExplicit(basePath, model, team['names'])
+
+    reference = explicitFront(basePath)
+    front = [(P, C) for P, C, policy in mdpSolver.solveTeam(model)]
+    assert len(front) > 2
+    assert mdpSolver.frontDistance(reference, front) < 1e-9
+
+def test_result_line_round_trip():
+    front = mdpSolver.solveTeam(teamModel(smallTeam()))
+    points = mdpSolver.parseResult(mdpSolver.formatResult(front))
+    assert points == [(P, C) for P, C, policy in front]
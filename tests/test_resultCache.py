@@ -0,0 +1,42 @@
+import os
+
+from extractJSON import loadKGDict
+from resultCache import ResultCache, teamKey
+
+team = {'Sat1': [{'Inst1__1': {'Cloud type': [0.9]}}]}
+teamTime = {'Sat1': {'Inst1__1': [[0, 5]]}}
+
+def test_cache_follows_inputs(tmp_path):
+    pathToDict = str(tmp_path / 'output.dict')
+    with open(pathToDict, 'w') as file:
+        file.write('Platform1: Sat1\nSensor1: Inst1\n')
+    modelPath = str(tmp_path / 'KG_MDP1.txt')
+    with open(modelPath, 'w') as file:
+        file.write('mdp\n')
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = teamKey(team, teamTime, 5, loadKGDict(pathToDict).version, 'multi(...)')
+    cache.put(key, {'result': 'Result: [(0.5, 1.0)]'}, [modelPath])
+
+    workDir = tmp_path / 'work'
+    workDir.mkdir()
+    assert cache.get(key, str(workDir)) == {'result': 'Result: [(0.5, 1.0)]'}
+    assert (workDir / 'KG_MDP1.txt').read_text() == 'mdp\n'
+
+    # other windows, mission, property or team: other entries
+    assert cache.get(teamKey(team, {'Sat1': {'Inst1__1': [[0, 4]]}}, 5, loadKGDict(pathToDict).version, 'multi(...)')) is None
+    assert cache.get(teamKey(team, teamTime, 6, loadKGDict(pathToDict).version, 'multi(...)')) is None
+    assert cache.get(teamKey(team, teamTime, 5, loadKGDict(pathToDict).version, 'multi(...)', explicit = True)) is None
+
+    # output.dict with the same content (touched) gives the same key, other content does not
+    os.utime(pathToDict)
+    assert teamKey(team, teamTime, 5, loadKGDict(pathToDict).version, 'multi(...)') == key
+    with open(pathToDict, 'w') as file:
+        file.write('Platform1: Sat1\nSensor1: Inst2\nSensor2: Inst1\n')
+    assert cache.get(teamKey(team, teamTime, 5, loadKGDict(pathToDict).version, 'multi(...)')) is None
+
+def test_eviction_keeps_new_entry(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), maxBytes = 1)
+    cache.put('old', 'x' * 100)
+    cache.put('new', 'y' * 100)
+    assert cache.get('old') is None
+    assert cache.get('new') == 'y' * 100
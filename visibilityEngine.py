@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+'''
+VISIBILITY OF THE (AGENT, SENSOR) PAIRS OF A TEAM, COMPUTED ONCE PER TEAM
+
+WINDOWS ARE (n, 2) INT ARRAYS OF [start, end) DAYS, SORTED AND MERGED (SEE extractJSON.eventWindows)
+- TWO PAIRS OVERLAP IF ANY OF THEIR WINDOWS DO. EVERY PAIR OF PAIRS IS CHECKED ONCE, WITH A TWO-POINTER SWEEP
+  OVER THE SORTED WINDOWS (O(n+m) INSTEAD OF O(n*m)), INTO THE overlap MATRIX
+- EACH PAIR ALSO HAS A TIME-SLOT BITSET (PYTHON INT, BIT t SET IF VISIBLE DURING DAY t). A SET OF PAIRS IS
+  VISIBLE AT THE SAME TIME IF THE AND OF THEIR BITSETS IS NOT 0, A MEASUREMENT IS COVERED WHEN THE OR OF THE
+  BITSETS OF ITS SENSORS IS SET, AND GUARDS ARE WRITTEN FROM THE RUNS OF SET BITS
+'''
+
+import numpy as np
+from extractJSON import mergeWindows
+
+def sweepOverlap(range1, range2):
+    ''' True if two sorted lists of disjoint windows (ex: [[0, 1], [4, 5]] and [[2, 4], [5, 7]]) overlap
+    '''
+    i = j = 0
+    while i < len(range1) and j < len(range2):
+        if min(range1[i][1], range2[j][1]) > max(range1[i][0], range2[j][0]):
+            return True
+        if range1[i][1] <= range2[j][1]:    # the window that ends first cannot overlap anything else
+            i += 1
+        else:
+            j += 1
+    return False
+
+def windowSlots(windows):
+    ''' time-slot bitset of windows: bit t is set if t is in one of the [start, end) windows
+    '''
+    slots = 0
+    for start, end in windows:
+        start = max(int(start), 0)
+        if end > start:
+            slots |= ((1 << (int(end) - start)) - 1) << start
+    return slots
+
+def slotWindows(slots):
+    ''' windows [[start, end], ...] of a time-slot bitset (inverse of windowSlots)
+    '''
+    windows = []
+    t = 0
+    while slots:
+        skip = (slots & -slots).bit_length() - 1     # unset slots before the next window
+        slots >>= skip
+        length = (~slots & (slots + 1)).bit_length() - 1      # set slots in a row
+        windows.append([t + skip, t + skip + length])
+        slots >>= length
+        t += skip + length
+    return windows
+
+def teamSlots(teamTime):
+    ''' time-slot bitsets of a team: {agent: {sensor: slots}}, same keys as teamTime (or teamTimeID)
+    '''
+    return dict((a, dict((s, windowSlots(teamTime[a][s])) for s in teamTime[a])) for a in teamTime)
+
+def slotsGuard(slots):
+    ''' PRISM constraint on t of a time-slot bitset, e.g. '((t >= 1) & (t < 5)) | ((t >= 10) & (t < 20))'
+    ('false' if it is never visible)
+    '''
+    windows = slotWindows(slots)
+    if not windows:
+        return 'false'
+    return ' | '.join('((t >= ' + str(start) + ') & (t < ' + str(end) + '))' for start, end in windows)
+
+class VisibilityEngine:
+    ''' visibility of the pairs lst_a = [(row, col), ...] of a team (rows of a_list, columns of s_list)
+    windows     merged windows of each pair, as lists
+    slots       time-slot bitset of each pair
+    overlap     (pairs x pairs) bool matrix, True if the two pairs are visible at the same time at some point
+    adj         overlap as adjacency bitmasks: bit j of adj[i] is set if overlap[i, j]
+    '''
+
+    def __init__(self, lst_a, a_list, s_list, teamTimeID):
+        self.pairs = list(lst_a)
+        self.windows = []
+        for row, col in self.pairs:
+            windows = np.asarray(teamTimeID[a_list[row]][s_list[col]], dtype = int).reshape(-1, 2)
+            self.windows.append(mergeWindows(windows)[0].tolist())
+        self.slots = [windowSlots(windows) for windows in self.windows]
+
+        num = len(self.pairs)
+        self.overlap = np.zeros((num, num), dtype = bool)
+        self.adj = [0] * num
+        for i in range(num):
+            for j in range(i+1, num):
+                if sweepOverlap(self.windows[i], self.windows[j]):
+                    self.overlap[i, j] = self.overlap[j, i] = True
+                    self.adj[i] |= 1 << j
+                    self.adj[j] |= 1 << i
+
+    def commonSlots(self, idx):
+        ''' time slots where all the pairs idx (indices into lst_a) are visible
+        '''
+        slots = -1
+        for i in idx:
+            slots &= self.slots[i]
+        return slots if idx else 0
+
+    def commonVisible(self, idx):
+        ''' True if all the pairs idx are visible at the same time at some point
+        '''
+        return self.commonSlots(idx) != 0
+
+    def commonWindows(self, idx):
+        ''' windows [[start, end], ...] where all the pairs idx are visible
+        '''
+        return slotWindows(self.commonSlots(idx))